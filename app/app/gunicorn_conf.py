@@ -0,0 +1,80 @@
+"""
+gunicorn config for app project.
+
+Serves the app in production, run from the app directory with
+
+    gunicorn -c python:app.gunicorn_conf
+
+SERVER_MODE picks the interface: 'wsgi' (the default) serves app.wsgi
+with threaded workers, 'asgi' serves app.asgi with uvicorn workers. The
+other settings come from GUNICORN_* environment variables.
+
+Django runs with DEBUG off unless DJANGO_DEBUG=1 is set, so it needs
+DJANGO_SECRET_KEY and DJANGO_ALLOWED_HOSTS. Static files, the admin's
+included, are served by WhiteNoise from STATIC_ROOT once
+`manage.py collectstatic` has gathered them.
+
+The app is loaded once in the master before the workers are forked, so
+Django, the rate tables and the premium grid are shared copy-on-write.
+Send the master HUP to replace the workers gracefully with the loaded
+code, or USR2 then TERM to the old master to deploy new code without
+dropping requests.
+"""
+import multiprocessing
+import os
+
+
+def env(name, default):
+    return os.environ.get(f'GUNICORN_{name}', default)
+
+
+# Before the app, and so the settings, is loaded
+os.environ.setdefault('DJANGO_DEBUG', '0')
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi')
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise ValueError(f'SERVER_MODE must be wsgi or asgi, not {SERVER_MODE}')
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'app.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app.wsgi:application'
+    worker_class = 'gthread'
+
+bind = env('BIND', '0.0.0.0:8000')
+workers = int(env('WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threads per worker of the wsgi mode, async workers ignore it
+threads = int(env('THREADS', 4))
+preload_app = env('PRELOAD', '1') == '1'
+# Seconds a worker may spend on a request, and to finish them on reload
+timeout = int(env('TIMEOUT', 30))
+graceful_timeout = int(env('GRACEFUL_TIMEOUT', 30))
+keepalive = int(env('KEEPALIVE', 5))
+# Recycle workers now and then so slow leaks can't grow unbounded
+max_requests = int(env('MAX_REQUESTS', 10000))
+max_requests_jitter = int(env('MAX_REQUESTS_JITTER', 1000))
+# The worker heartbeat file, kept off disk in containers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = env('WORKER_TMP_DIR', '/dev/shm')
+accesslog = env('ACCESSLOG', '-')
+errorlog = '-'
+loglevel = env('LOGLEVEL', 'info')
+
+
+def warm_up():
+    """Build the state every worker needs before the workers are forked"""
+    from core.rate_grid import get_grid
+
+    get_grid()
+
+
+def on_starting(server):
+    if preload_app:
+        warm_up()
+
+        # Workers must open their own connections (and connection pools)
+        # rather than share the master's sockets
+        from django.db import connections
+
+        connections.close_all()
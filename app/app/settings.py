@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -19,13 +22,23 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.1/howto/deployment/checklist/
 
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '!k*)y&*-m=lfo#34!0t4q#ymy1mn6(&a9f*7%eh0g=c9t)6cxc'
-
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# On for runserver and the tests, app.gunicorn_conf turns it off
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = []
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    if not DEBUG:
+        raise ImproperlyConfigured('Set DJANGO_SECRET_KEY when DEBUG is off')
+    SECRET_KEY = '!k*)y&*-m=lfo#34!0t4q#ymy1mn6(&a9f*7%eh0g=c9t)6cxc'
+
+# Comma separated host names, localhost is allowed as well while DEBUG
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
 
 
 # Application definition
@@ -51,7 +64,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the time of the other middleware is counted as well
+    'core.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves the collected static files, runserver only does it in DEBUG
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,7 +77,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'app.urls'
+# app.asgi serves app.urls_async, which swaps in the async views
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'app.urls')
 
 TEMPLATES = [
     {
@@ -87,10 +105,151 @@ WSGI_APPLICATION = 'app.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# Use PostgreSQL when the database host is given (see docker-compose.yml)
+if os.environ.get('DB_HOST'):
+    DATABASES['default'] = {
+        # Django's backend plus health checks and an optional pool
+        'ENGINE': 'core.backends.postgresql',
+        'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'NAME': os.environ.get('DB_NAME'),
+        'USER': os.environ.get('DB_USER'),
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open between requests, in seconds
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Make sure a kept connection still works before reusing it
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+    # Share a pool of connections between the threads of a worker
+    if int(os.environ.get('DB_POOL_MAX_CONNS', 0)):
+        DATABASES['default']['POOL_OPTIONS'] = {
+            'MIN_CONNS': int(os.environ.get('DB_POOL_MIN_CONNS', 1)),
+            'MAX_CONNS': int(os.environ.get('DB_POOL_MAX_CONNS')),
+            # Seconds to wait for a connection when all are taken
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+        }
+        # Return connections to the pool at the end of every request,
+        # rather than keeping one per thread
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+
+# Caches
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Per process LRU cache of token to user lookups, for when the
+    # default cache is not shared between workers
+    'auth_tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth-tokens',
+        # Other workers only see a token deleted or a user deactivated
+        # when their copy expires, so keep this short
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Cache of serialized quates for the quate detail view, and how long
+# they are kept in seconds. A saved quate is only dropped from the cache
+# of every worker when the cache is shared, so a per-process cache only
+# keeps them briefly.
+QUATE_CACHE = 'default'
+_SHARED_CACHE = 'locmem' not in CACHES['default']['BACKEND']
+QUATE_CACHE_TIMEOUT = int(os.environ.get(
+    'QUATE_CACHE_TIMEOUT', 300 if _SHARED_CACHE else 5
+))
+
+# Most quates created by one bulk request to the quate API
+QUATE_BULK_MAX_SIZE = int(os.environ.get('QUATE_BULK_MAX_SIZE', 1000))
+
+# Cache used by core.authentication.CachedTokenAuthentication. The
+# shared default cache when there is one, so a deleted token or a
+# deactivated user is dropped for every worker at once.
+AUTH_TOKEN_CACHE = os.environ.get(
+    'AUTH_TOKEN_CACHE', 'default' if _SHARED_CACHE else 'auth_tokens'
+)
+
+
+# Premiums remembered by core.rating.pricing_cache
+PRICING_CACHE_SIZE = int(os.environ.get('PRICING_CACHE_SIZE', 10000))
+
+# Version of core.rate_tables quates are priced with, and where the
+# premium grids built from it are kept (see core.rate_grid)
+RATE_TABLE_VERSION = os.environ.get('RATE_TABLE_VERSION', '2021.2')
+RATE_GRID_DIR = Path(os.environ.get('RATE_GRID_DIR', BASE_DIR / 'rate_grids'))
+
+# New quates and billing bots get time-ordered UUIDs (see core.ids),
+# set to 0 for random uuid4 keys
+TIME_ORDERED_IDS = os.environ.get('TIME_ORDERED_IDS', '1') == '1'
+
+# Progress of an interrupted `manage.py billing_run`
+BILLING_RUN_CHECKPOINT = os.environ.get(
+    'BILLING_RUN_CHECKPOINT', BASE_DIR / 'billing_run.checkpoint'
+)
+
+# Share of the requests timed by core.instrumentation, and whether their
+# timings are sent back in a Server-Timing header, to staff users and
+# requests bearing METRICS_TOKEN only
+INSTRUMENTATION_SAMPLE_RATE = float(
+    os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 0.1)
+)
+INSTRUMENTATION_SERVER_TIMING = (
+    os.environ.get('INSTRUMENTATION_SERVER_TIMING', '1') == '1'
+)
+# Bearer token Prometheus scrapes /metrics with, staff users can always
+# read it
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/3.1/topics/auth/passwords/
+
+# 'pbkdf2' or 'argon2', passwords hashed with the other one keep working
+# and are rehashed with this one on login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Costs of the hashers, changing them rehashes passwords on login
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 216000))
+ARGON2_TIME_COST = int(os.environ.get('ARGON2_TIME_COST', 2))
+# In KiB
+ARGON2_MEMORY_COST = int(os.environ.get('ARGON2_MEMORY_COST', 512))
+ARGON2_PARALLELISM = int(os.environ.get('ARGON2_PARALLELISM', 2))
+
+
+# Threads running the API views for the ASGI app, see core.async_views
+API_WORKER_THREADS = int(os.environ.get('API_WORKER_THREADS', 16))
+
+# Threads hashing passwords for the async views, see user.hashing
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 4))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -129,5 +288,8 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+# Where `manage.py collectstatic` gathers the static files of the apps,
+# the admin's included, for WhiteNoiseMiddleware to serve
+STATIC_ROOT = Path(os.environ.get('STATIC_ROOT', BASE_DIR / 'static'))
 
 AUTH_USER_MODEL = 'core.User'
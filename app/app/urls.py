@@ -16,9 +16,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/user/pet/', include('pet.urls')),
     path('api/quate/', include('quate.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
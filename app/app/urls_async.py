@@ -0,0 +1,16 @@
+"""URL Configuration served by app.asgi
+
+The same URLs as app.urls, served by async views (see core.async_views).
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+from core.instrumentation import metrics_view
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('api/user/', include('user.urls_async')),
+    path('api/user/pet/', include('pet.urls_async')),
+    path('api/quate/', include('quate.urls_async')),
+    path('metrics', metrics_view, name='metrics'),
+]
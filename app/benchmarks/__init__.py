@@ -0,0 +1,60 @@
+"""Benchmarks for the rainwalk API
+
+Every benchmark is a module that can be run from the app directory, for
+example `python -m benchmarks.rating`.
+"""
+import contextlib
+import os
+import time
+
+
+def setup():
+    """Configure Django so a benchmark can use the models"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    # The host name of Django's test clients
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+
+def timeit(func, *args, repeat=5):
+    """Return the best wall clock time of calling func over a few runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def percentile(samples, percent):
+    """Return the given percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+@contextlib.contextmanager
+def test_database():
+    """Run a benchmark against a freshly migrated throwaway database"""
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def client():
+    """Return an API test client"""
+    from rest_framework.test import APIClient
+
+    return APIClient()
@@ -0,0 +1,11 @@
+"""Latency, queries and allocations of every API endpoint
+
+Seeds a throwaway database with a realistic volume of users, policies
+and quates, then measures each endpoint in-process with the API test
+client. Results are printed and can be saved as JSON to compare runs:
+
+    python -m benchmarks.api --output before.json
+    python -m benchmarks.api --compare before.json
+
+Runs against SQLite by default, or PostgreSQL with the DB_* variables.
+"""
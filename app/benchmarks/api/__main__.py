@@ -0,0 +1,159 @@
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from benchmarks import client, percentile, setup, test_database
+from benchmarks.api import __doc__
+from benchmarks.api.endpoints import endpoints
+from benchmarks.api.seed import seed
+
+
+def measure(endpoint, api, token, requests, samples):
+    """Time an endpoint, then count its queries and allocations
+
+    Queries and allocations are sampled in a separate pass, as tracing
+    them slows the requests down.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        endpoint.request(api, token)
+        latencies.append(time.perf_counter() - start)
+
+    queries = []
+    allocated = []
+    for _ in range(samples):
+        with CaptureQueriesContext(connection) as captured:
+            tracemalloc.start()
+            endpoint.request(api, token)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        queries.append(len(captured))
+        allocated.append(peak)
+
+    return {
+        'requests': requests,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'rps': requests / sum(latencies),
+        'queries': statistics.mean(queries),
+        'peak_alloc_kib': statistics.mean(allocated) / 1024,
+    }
+
+
+def environment(args):
+    from django import VERSION
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': '.'.join(map(str, VERSION[:3])),
+        'database': connection.vendor,
+        'users': args.users,
+        'policies_per_user': args.policies,
+        'requests': args.requests,
+    }
+
+
+def change(value, before):
+    if not before:
+        return f'{"n/a":>7}'
+
+    return f'{(value - before) / before:+7.1%}'
+
+
+def compare(results, baseline):
+    """Print the change of every metric against an earlier run"""
+    print(f'\nChange against {baseline["environment"]["commit"]} '
+          f'({baseline["environment"]["date"]})')
+    for name, metrics in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        changes = '  '.join(
+            f'{metric} {change(metrics[metric], before[metric])}'
+            for metric in ('p50_ms', 'p99_ms', 'queries', 'peak_alloc_kib')
+        )
+        print(f'{name:20} {changes}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--policies', type=int, default=5,
+                        help='policies per user')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='timed requests per endpoint')
+    parser.add_argument('--samples', type=int, default=20,
+                        help='requests traced for queries and allocations')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--endpoint', action='append',
+                        help='only measure these endpoints')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--compare', help='JSON of an earlier run')
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+
+    results = {}
+    with test_database():
+        # Debug mode would keep every query of the run in memory
+        settings.DEBUG = False
+        email, token = seed(args.users, args.policies)
+        from core.models import Policy
+        quate_id = Policy.objects.filter(user__email=email).values_list(
+            'policy_quate_number', flat=True
+        ).first()
+
+        api = client()
+        for endpoint in endpoints(email, quate_id):
+            if args.endpoint and endpoint.name not in args.endpoint:
+                continue
+            for _ in range(args.warmup):
+                endpoint.request(api, token)
+            results[endpoint.name] = metrics = measure(
+                endpoint, api, token, args.requests, args.samples
+            )
+            print(f'{endpoint.name:20} '
+                  f'p50 {metrics["p50_ms"]:8.2f} ms  '
+                  f'p99 {metrics["p99_ms"]:8.2f} ms  '
+                  f'{metrics["rps"]:8.1f} req/s  '
+                  f'{metrics["queries"]:5.1f} queries  '
+                  f'{metrics["peak_alloc_kib"]:8.1f} KiB')
+
+        run = {'environment': environment(args), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(run, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == '__main__':
+    main()
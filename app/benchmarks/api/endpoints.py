@@ -0,0 +1,55 @@
+"""The requests measured for every endpoint"""
+import itertools
+
+from benchmarks.api.seed import PASSWORD
+
+
+class Endpoint:
+    """A request to measure, made with the API test client"""
+
+    def __init__(self, name, method, url, status=200, auth=False,
+                 payload=None):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.status = status
+        self.auth = auth
+        # A callable returning the body of the next request
+        self.payload = payload
+
+    def request(self, api, token):
+        kwargs = {}
+        if self.payload is not None:
+            kwargs['data'] = self.payload()
+        if self.auth:
+            kwargs['HTTP_AUTHORIZATION'] = f'Token {token}'
+
+        res = getattr(api, self.method)(self.url, **kwargs)
+        assert res.status_code == self.status, (self.name, res.status_code)
+        return res
+
+
+def endpoints(email, quate_id):
+    """Every endpoint measured, given a seeded user and one of its quates"""
+    numbers = itertools.count()
+
+    def new_user():
+        return {
+            'email': f'bench-{next(numbers)}@rainwalk.io',
+            'password': PASSWORD,
+            'name': 'Bench',
+        }
+
+    return [
+        Endpoint('user.create', 'post', '/api/user/create/', status=201,
+                 payload=new_user),
+        Endpoint('user.token', 'post', '/api/user/token/',
+                 payload=lambda: {'email': email, 'password': PASSWORD}),
+        Endpoint('user.me', 'get', '/api/user/me/', auth=True),
+        Endpoint('pet.policies', 'get', '/api/user/pet/polices/',
+                 auth=True),
+        Endpoint('pet.policies.expand', 'get',
+                 '/api/user/pet/polices/?expand=quate', auth=True),
+        Endpoint('quate.quates', 'get', '/api/quate/quates/'),
+        Endpoint('quate.detail', 'get', f'/api/quate/quates/{quate_id}/'),
+    ]
@@ -0,0 +1,48 @@
+"""Seed data for the API benchmarks"""
+import random
+
+
+PASSWORD = 'password12345'
+
+
+def seed(users, policies_per_user, seed=0):
+    """Create users with policies and their quates
+
+    Returns the email of a user with policies and that user's token.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+
+    from benchmarks.rating import sample_quates
+    from core.models import Policy, Quate
+
+    # Hashing is slow on purpose, every seeded user shares one hash
+    password = make_password(PASSWORD)
+    user_model = get_user_model()
+    user_model.objects.bulk_create(
+        user_model(
+            email=f'user{number}@rainwalk.io',
+            name=f'User {number}',
+            password=password,
+        )
+        for number in range(users)
+    )
+    seeded = list(user_model.objects.order_by('pk'))
+
+    picker = random.Random(seed)
+    quates = sample_quates(users * policies_per_user, combinations=500,
+                           seed=seed)
+    quates = Quate.objects.bulk_create(quates)
+    Policy.objects.bulk_create(
+        Policy(
+            policy_number=f'PA-{number:08}',
+            policy_premium=picker.randrange(3),
+            policy_quate_number=quate,
+            user=seeded[number // policies_per_user],
+        )
+        for number, quate in enumerate(quates)
+    )
+
+    user = seeded[0]
+    return user.email, Token.objects.create(user=user).key
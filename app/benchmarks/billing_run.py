@@ -0,0 +1,62 @@
+"""Measure the billing run's throughput and memory as the bots grow
+
+Renews growing numbers of due bots and reports rows/sec and the peak
+Python memory of the run, which should stay flat.
+
+    python -m benchmarks.billing_run --bots 1000 10000 50000
+"""
+import argparse
+import datetime
+import tracemalloc
+
+from benchmarks import setup, test_database
+
+
+def sample_bots(count):
+    """Create due bots, each with its own user"""
+    from core.models import BillingBot, User
+
+    users = User.objects.bulk_create(
+        User(email=f'bench{number}@rainwalk.io') for number in range(count)
+    )
+    if users[0].pk is None:
+        users = list(User.objects.order_by('pk'))
+    BillingBot.objects.bulk_create(BillingBot(user=user) for user in users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bots', type=int, nargs='+',
+                        default=[1000, 10000, 50000])
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    setup()
+    from django.utils import timezone
+
+    from core.billing import billing_run
+    from core.models import BillingBot, User
+
+    moment = timezone.now() + datetime.timedelta(days=1)
+    with test_database():
+        for count in args.bots:
+            BillingBot.objects.all().delete()
+            User.objects.all().delete()
+            sample_bots(count)
+
+            tracemalloc.start()
+            renewed, seconds = billing_run(
+                moment,
+                chunk_size=args.chunk_size,
+                batch_size=args.batch_size,
+            )
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f'{renewed:8} bots  {renewed / seconds:8.0f} rows/sec  '
+                  f'peak {peak / 2 ** 20:6.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
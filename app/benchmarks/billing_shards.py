@@ -0,0 +1,57 @@
+"""Measure how a sharded billing run scales with its worker processes
+
+Needs PostgreSQL, point it at one with the DB_* environment variables.
+SQLite serializes writers, so extra workers only wait on each other.
+
+    DB_HOST=localhost DB_NAME=app DB_USER=postgres DB_PASS=... \\
+        python -m benchmarks.billing_shards --bots 100000 --workers 1 2 4 8
+"""
+import argparse
+import datetime
+import sys
+
+from benchmarks import setup, test_database
+from benchmarks.billing_run import sample_bots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bots', type=int, default=100000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[1, 2, 4, 8])
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.utils import timezone
+
+    from core.billing import run_shards
+    from core.models import BillingBot
+
+    if connection.vendor != 'postgresql':
+        sys.exit('Set DB_HOST and the other DB_* variables to a PostgreSQL '
+                 'server to run this benchmark')
+
+    with test_database():
+        sample_bots(args.bots)
+        moment = timezone.now()
+        baseline = None
+        for workers in args.workers:
+            # Every round renews all the bots for another month
+            moment += datetime.timedelta(days=400)
+            renewed, seconds = run_shards(
+                workers, moment=moment, batch_size=args.batch_size
+            )
+            assert renewed == args.bots
+            assert not BillingBot.objects.unpaid_as_of(moment).exists()
+
+            rate = renewed / seconds
+            baseline = baseline or rate
+            print(f'{workers:3} workers  {rate:9.0f} rows/sec  '
+                  f'{rate / baseline:5.2f}x  '
+                  f'({rate / baseline / workers:4.0%} efficiency)')
+
+
+if __name__ == '__main__':
+    main()
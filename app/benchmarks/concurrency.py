@@ -0,0 +1,118 @@
+"""Many concurrent keep-alive clients against running app servers
+
+Start the app under WSGI and ASGI, for example
+
+    python manage.py runserver 8000
+    uvicorn app.asgi:application --port 8001
+
+then compare them with
+
+    python -m benchmarks.concurrency --connections 1000 \\
+        --target wsgi=http://localhost:8000/api/quate/quates/ \\
+        --target asgi=http://localhost:8001/api/quate/quates/
+
+With --slow each client trickles its request headers, like a client on a
+bad mobile connection, which ties up a thread of a WSGI server.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from benchmarks import percentile
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, returning its status code"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+
+    return int(status_line.split()[1])
+
+
+async def client(url, deadline, slow, results):
+    """Send requests over one connection until the deadline"""
+    parts = urlsplit(url)
+    request = (
+        f'GET {parts.path or "/"} HTTP/1.1\r\n'
+        f'Host: {parts.hostname}\r\n'
+        f'Accept: application/json\r\n'
+        f'\r\n'
+    ).encode()
+    try:
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, parts.port or 80
+        )
+    except OSError:
+        results['errors'] += 1
+        return
+
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            if slow:
+                for line in request.splitlines(keepends=True):
+                    writer.write(line)
+                    await writer.drain()
+                    await asyncio.sleep(slow)
+            else:
+                writer.write(request)
+            status = await read_response(reader)
+            results['latencies'].append(time.perf_counter() - start)
+            if status >= 400:
+                results['errors'] += 1
+    except (OSError, ConnectionError, asyncio.IncompleteReadError):
+        results['errors'] += 1
+    finally:
+        writer.close()
+
+
+async def run(url, connections, duration, slow):
+    results = {'latencies': [], 'errors': 0}
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(
+        client(url, deadline, slow, results) for _ in range(connections)
+    ))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=url of a server to measure')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--slow', type=float, default=0,
+                        help='seconds to wait between request lines')
+    args = parser.parse_args()
+
+    for target in args.target:
+        name, _, url = target.partition('=')
+        results = asyncio.run(
+            run(url, args.connections, args.duration, args.slow)
+        )
+        latencies = results['latencies'] or [0]
+        print(
+            f'{name:8} {len(results["latencies"]) / args.duration:8.1f} '
+            f'req/s  p50 {percentile(latencies, 50) * 1000:8.1f} ms  '
+            f'p99 {percentile(latencies, 99) * 1000:8.1f} ms  '
+            f'errors {results["errors"]}'
+        )
+
+
+if __name__ == '__main__':
+    main()
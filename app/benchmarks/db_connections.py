@@ -0,0 +1,76 @@
+"""Measure what opening a database connection costs every request
+
+Runs the same requests with a new connection per request, persistent
+connections and the connection pool. Point it at PostgreSQL with the
+DB_* environment variables, SQLite connections are nearly free.
+
+    python -m benchmarks.db_connections --requests 2000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks import client, percentile, setup, test_database
+
+
+MODES = {
+    'per-request': {'DB_CONN_MAX_AGE': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60'},
+    'pooled': {'DB_CONN_MAX_AGE': '0', 'DB_POOL_MAX_CONNS': '4'},
+}
+
+
+def run(requests):
+    """Time quate detail requests with the current database settings"""
+    setup()
+    from core.models import Quate
+
+    with test_database():
+        quate = Quate.objects.create()
+        url = f'/api/quate/quates/{quate.quate_id}/'
+        api = client()
+        for _ in range(10):
+            api.get(url)
+
+        samples = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            api.get(url)
+            samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--mode', choices=MODES)
+    args = parser.parse_args()
+
+    if args.mode:
+        samples = run(args.requests)
+        print(
+            f'{args.mode:12} '
+            f'p50 {percentile(samples, 50) * 1000:7.3f} ms  '
+            f'p99 {percentile(samples, 99) * 1000:7.3f} ms  '
+            f'{len(samples) / sum(samples):8.0f} req/s'
+        )
+        return
+
+    if not os.environ.get('DB_HOST'):
+        print('DB_HOST is not set, measuring SQLite')
+    for mode, env in MODES.items():
+        if mode == 'pooled' and not os.environ.get('DB_HOST'):
+            continue
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.db_connections',
+             '--requests', str(args.requests), '--mode', mode],
+            env={**os.environ, **env},
+            check=True,
+        )
+
+
+if __name__ == '__main__':
+    main()
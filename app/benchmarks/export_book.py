@@ -0,0 +1,79 @@
+"""Measure the throughput and memory of exporting the book
+
+Exports growing numbers of policies, and the quates behind them, and
+reports rows/sec, the peak Python memory of the export, which should
+stay flat, and how long 10M rows would take at that rate.
+
+    python -m benchmarks.export_book --rows 10000 100000 --format csv
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+from benchmarks import setup, test_database
+
+
+TARGET_ROWS = 10_000_000
+
+
+def sample_book(count):
+    """Create policies, each with its own quate and user"""
+    from core.models import Policy, Quate, User
+
+    users = User.objects.bulk_create(
+        User(email=f'bench{number}@rainwalk.io', state='NY')
+        for number in range(count)
+    )
+    if users[0].pk is None:
+        users = list(User.objects.order_by('pk'))
+    quates = Quate.objects.bulk_create(Quate() for _ in range(count))
+    Policy.objects.bulk_create(
+        Policy(policy_number=f'P-{number}', policy_quate_number=quate,
+               user=user)
+        for number, (quate, user) in enumerate(zip(quates, users))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[10000, 100000])
+    parser.add_argument('--format', dest='file_format', default='csv',
+                        choices=['csv', 'parquet'])
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    setup()
+    from core.export import export_book
+    from core.models import Policy, Quate, User
+
+    with test_database(), tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f'book.{args.file_format}')
+        for count in args.rows:
+            Policy.objects.all().delete()
+            Quate.objects.all().delete()
+            User.objects.all().delete()
+            sample_book(count)
+
+            for table in ('policies', 'quates'):
+                options = {'chunk_size': args.chunk_size}
+                written, seconds = export_book(
+                    table, path, args.file_format, **options
+                )
+                # Tracing slows the export down, so memory is measured
+                # on a second run
+                tracemalloc.start()
+                export_book(table, path, args.file_format, **options)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                rate = written / seconds
+                print(f'{table:8} {written:8} rows  {rate:8.0f} rows/sec  '
+                      f'peak {peak / 2 ** 20:6.1f} MiB  '
+                      f'{os.path.getsize(path) / 2 ** 20:7.1f} MiB file  '
+                      f'10M rows in {TARGET_ROWS / rate / 60:5.1f} min')
+
+
+if __name__ == '__main__':
+    main()
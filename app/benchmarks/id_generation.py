@@ -0,0 +1,87 @@
+"""Compare inserting rows keyed by random and time-ordered UUIDs
+
+Fills a quate-like table with random uuid4 keys and another with
+time-ordered uuid7 keys (see core.ids), a transaction per batch, and
+reports the insert rate of the first and last batches and the size of
+the key indexes. Random keys slow down as the index outgrows the cache.
+
+    python -m benchmarks.id_generation --rows 1000000
+
+Run it against PostgreSQL (with the DB_* environment variables) to see
+the effect on a server's buffer cache.
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks import setup, test_database
+from benchmarks.uuid_keys import create_tables, index_sizes
+
+
+def insert(connection, suffix, make_id, rows, batch_size):
+    """Insert the rows and return the seconds every batch took"""
+    from django.db import transaction
+    from django.db.models import UUIDField
+
+    field = UUIDField()
+    timings = []
+    for start in range(0, rows, batch_size):
+        count = min(batch_size, rows - start)
+        started = time.perf_counter()
+        keys = [
+            field.get_db_prep_value(make_id(), connection)
+            for _ in range(count)
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO bench_quate_{suffix} VALUES (%s, %s)',
+                [(key, 'Max') for key in keys]
+            )
+            cursor.executemany(
+                f'INSERT INTO bench_policy_{suffix} VALUES (%s, %s)',
+                list(zip(range(start, start + count), keys))
+            )
+        timings.append(time.perf_counter() - started)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.db.models import UUIDField
+
+    from core.ids import uuid7
+
+    generators = {'uuid4': uuid.uuid4, 'uuid7': uuid7}
+    key_type = UUIDField().db_type(connection)
+    # Rate over the first and last tenth of the batches
+    tail = max(1, args.rows // args.batch_size // 10)
+
+    with test_database():
+        for suffix, make_id in generators.items():
+            with connection.cursor() as cursor:
+                create_tables(cursor, key_type, suffix)
+            timings = insert(
+                connection, suffix, make_id, args.rows, args.batch_size
+            )
+            with connection.cursor() as cursor:
+                primary, foreign = index_sizes(
+                    cursor, connection.vendor, suffix
+                )
+
+            first = tail * args.batch_size / sum(timings[:tail])
+            last = tail * args.batch_size / sum(timings[-tail:])
+            print(f'{suffix}  {args.rows / sum(timings):8.0f} rows/sec  '
+                  f'first {first:8.0f}  last {last:8.0f}  '
+                  f'pk index {primary / 2 ** 20:7.2f} MiB  '
+                  f'fk index {foreign / 2 ** 20:7.2f} MiB')
+
+
+if __name__ == '__main__':
+    main()
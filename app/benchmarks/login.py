@@ -0,0 +1,81 @@
+"""Login throughput of /api/user/token/ with different password hashers
+
+    python -m benchmarks.login --logins 50
+"""
+import argparse
+import time
+
+from benchmarks import client, percentile, setup, test_database
+
+
+HASHERS = {
+    'pbkdf2': [
+        'core.hashers.TunedPBKDF2PasswordHasher',
+        'core.hashers.TunedArgon2PasswordHasher',
+    ],
+    'argon2': [
+        'core.hashers.TunedArgon2PasswordHasher',
+        'core.hashers.TunedPBKDF2PasswordHasher',
+    ],
+}
+
+CONFIGS = [
+    ('pbkdf2 216000 iterations', 'pbkdf2', {'PBKDF2_ITERATIONS': 216000}),
+    ('pbkdf2 100000 iterations', 'pbkdf2', {'PBKDF2_ITERATIONS': 100000}),
+    ('argon2 t=2 m=512KiB p=2', 'argon2', {
+        'ARGON2_TIME_COST': 2,
+        'ARGON2_MEMORY_COST': 512,
+        'ARGON2_PARALLELISM': 2,
+    }),
+    ('argon2 t=3 m=64MiB p=4', 'argon2', {
+        'ARGON2_TIME_COST': 3,
+        'ARGON2_MEMORY_COST': 65536,
+        'ARGON2_PARALLELISM': 4,
+    }),
+]
+
+
+def measure(email, logins):
+    """Log in repeatedly, returning wall clock and CPU time per login"""
+    api = client()
+    payload = {'email': email, 'password': 'password12345'}
+    wall = []
+    cpu = []
+    for _ in range(logins):
+        start, start_cpu = time.perf_counter(), time.process_time()
+        res = api.post('/api/user/token/', payload)
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - start_cpu)
+        assert res.status_code == 200, res.data
+
+    return wall, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=50)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+
+    with test_database():
+        for number, (name, hasher, costs) in enumerate(CONFIGS):
+            email = f'login{number}@rainwalk.io'
+            with override_settings(PASSWORD_HASHERS=HASHERS[hasher],
+                                   **costs):
+                get_user_model().objects.create_user(email, 'password12345')
+                wall, cpu = measure(email, args.logins)
+
+            print(
+                f'{name:26} '
+                f'p50 {percentile(wall, 50) * 1000:7.1f} ms  '
+                f'p99 {percentile(wall, 99) * 1000:7.1f} ms  '
+                f'cpu {sum(cpu) / len(cpu) * 1000:7.1f} ms/login  '
+                f'{len(wall) / sum(wall):6.1f} logins/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Throughput of importing policies in bulk against one API call a row
+
+Posts a few rows to the quate and policy APIs one at a time, the way a
+migration had to load a book before, then imports growing files with
+pet.importer. One row in ten of the files is invalid and rejected.
+
+    python -m benchmarks.policy_import --rows 10000 100000
+"""
+import argparse
+import time
+
+from benchmarks import client, setup, test_database
+
+
+USERS = 100
+
+
+def sample_rows(count):
+    """Yield rows of an import file, spread over the sample users"""
+    for number in range(count):
+        yield {
+            'email': f'bench{number % USERS}@rainwalk.io',
+            'policy_number': f'PA-{number}',
+            'policy_premium': 'gold',
+            'breed_factor': 'Unicorn' if number % 10 == 9 else 'Beagle',
+            'age_factor': '2 years',
+            'policy_limit_factor': '$5,000',
+        }
+
+
+def per_request(count):
+    """Return the rows/sec of creating each quate and policy by API"""
+    from core.models import User
+
+    api = client()
+    api.force_authenticate(User.objects.get(email='bench0@rainwalk.io'))
+    start = time.perf_counter()
+    for row in sample_rows(count):
+        res = api.post('/api/quate/quates/', {})
+        api.post('/api/user/pet/polices/', {
+            'policy_number': f'API-{row["policy_number"]}',
+            'policy_premium': 1,
+            'policy_quate_number': res.data['quate_id'],
+        })
+
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+',
+                        default=[10000, 100000])
+    parser.add_argument('--api-rows', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from core.models import Policy, Quate, User
+    from pet.importer import import_policies
+
+    with test_database():
+        User.objects.bulk_create(
+            User(email=f'bench{number}@rainwalk.io')
+            for number in range(USERS)
+        )
+        print(f'api          {args.api_rows:8} rows  '
+              f'{per_request(args.api_rows):8.0f} rows/sec')
+
+        for count in args.rows:
+            Policy.objects.all().delete()
+            Quate.objects.all().delete()
+
+            start = time.perf_counter()
+            imported, rejected = import_policies(
+                sample_rows(count), args.batch_size
+            )
+            seconds = time.perf_counter() - start
+
+            print(f'bulk import  {count:8} rows  {count / seconds:8.0f} '
+                  f'rows/sec  {imported} imported  {rejected} rejected')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Throughput of the quate detail view with and without the cache
+
+    python -m benchmarks.quate_cache --requests 2000
+"""
+import argparse
+import time
+
+from benchmarks import client, setup, test_database
+
+
+def measure(url, requests, **headers):
+    api = client()
+    start = time.perf_counter()
+    for _ in range(requests):
+        api.get(url, **headers)
+
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import override_settings
+    from core.models import Quate
+
+    with test_database():
+        url = f'/api/quate/quates/{Quate.objects.create().quate_id}/'
+
+        with override_settings(QUATE_CACHE_TIMEOUT=0):
+            uncached = measure(url, args.requests)
+        cached = measure(url, args.requests)
+        etag = client().get(url)['ETag']
+        not_modified = measure(url, args.requests, HTTP_IF_NONE_MATCH=etag)
+
+    print(f'uncached      {uncached:8.0f} req/s')
+    print(f'cached        {cached:8.0f} req/s')
+    print(f'304 not mod.  {not_modified:8.0f} req/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Compare the batch rating engine and the premium grid against pricing
+quates one by one
+
+    python -m benchmarks.rating --quates 10000 --combinations 500
+"""
+import argparse
+import random
+
+from benchmarks import setup, timeit
+
+
+def sample_quates(count, combinations, seed=0):
+    """Build unsaved quates from a number of random factor combinations"""
+    from core.constants.age_list import AGE_LIST
+    from core.constants.breed_list import BREED_LIST
+    from core.constants.policy_limit_factor_list import \
+        POLICY_LIMIT_FACTOR_LIST
+    from core.models import Quate
+
+    picker = random.Random(seed)
+    breeds = [breed for _, group in BREED_LIST for breed, _ in group]
+    ages = [age for age, _ in dict(AGE_LIST).get('Dog')]
+    limits = [limit for limit, _ in POLICY_LIMIT_FACTOR_LIST]
+
+    quates = []
+    for _ in range(count):
+        rng = random.Random(picker.randrange(combinations))
+        quates.append(Quate(
+            pet_name=f'Pet {len(quates)}',
+            gender_factor=rng.choice(['Male', 'Female']),
+            breed_factor=rng.choice(breeds),
+            age_factor=rng.choice(ages),
+            policy_limit_factor=rng.choice(limits),
+            deductibale_factor=rng.choice([100, 250, 500, 750, 1000]),
+            coinsurance_factor=rng.choice([50, 70, 80, 90]),
+            exam_fee_factor=rng.random() < 0.5,
+            smart_collar_factor=rng.random() < 0.2,
+        ))
+
+    return quates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--quates', type=int, default=10000)
+    parser.add_argument('--combinations', type=int, default=500,
+                        help='distinct rating factor combinations')
+    args = parser.parse_args()
+
+    setup()
+    from core import rating
+    from core.rate_grid import get_grid
+
+    quates = sample_quates(args.quates, args.combinations)
+    rows = [
+        [getattr(quate, field) for field in rating.RATING_FIELDS]
+        for quate in quates
+    ]
+    assert [rating.price_quate(q) for q in quates] == rating.price_rows(rows)
+
+    # price_quate goes through the grid, time the rater on its own
+    rater = rating.get_rater()
+    naive = timeit(lambda: [rater.price(q) for q in quates])
+    batch = timeit(rating.price_rows, rows)
+    rating.pricing_cache.clear()
+    cached = timeit(lambda: [rating.price_quate_cached(q) for q in quates])
+    grid = get_grid()
+    gridded = timeit(lambda: [grid.price(q) for q in quates])
+
+    print(f'quates:   {args.quates}')
+    print(f'per-quate: {naive * 1000:9.2f} ms')
+    print(f'batch:     {batch * 1000:9.2f} ms')
+    print(f'speedup:   {naive / batch:9.1f}x')
+    print(f'cached:    {cached * 1000:9.2f} ms')
+    print(f'cache:     {rating.pricing_cache.stats()}')
+    print(f'grid:      {gridded * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Load test /api/quate/quates/ under each way of serving the app
+
+Starts the app with runserver and with gunicorn in its wsgi and asgi
+modes (see app.gunicorn_conf), one after the other, drives each with
+the concurrency benchmark's keep-alive clients and reports requests per
+second. Unless DB_HOST points at PostgreSQL, a throwaway SQLite database
+is migrated and seeded for the run.
+
+    python -m benchmarks.serve --workers 4 --connections 200 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import concurrency, percentile
+
+
+def modes(port, workers, threads):
+    gunicorn = [
+        sys.executable, '-m', 'gunicorn', '-c', 'python:app.gunicorn_conf',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+        '--threads', str(threads), '--access-logfile', '/dev/null',
+    ]
+    return {
+        'runserver': ({}, [
+            sys.executable, 'manage.py', 'runserver', '--noreload',
+            f'127.0.0.1:{port}',
+        ]),
+        'wsgi': ({'SERVER_MODE': 'wsgi'}, gunicorn),
+        'asgi': ({'SERVER_MODE': 'asgi'}, gunicorn),
+    }
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+def prepare_database(env, quates):
+    """Migrate and seed the database the servers will use"""
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+        env=env, check=True,
+    )
+    subprocess.run(
+        [sys.executable, '-c',
+         'import django; django.setup(); '
+         'from core.models import Quate; '
+         f'Quate.objects.bulk_create(Quate() for _ in range({quates}))'],
+        env=env, check=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--mode', action='append',
+                        choices=['runserver', 'wsgi', 'asgi'],
+                        help='modes to measure, all of them by default')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--quates', type=int, default=20)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='app.settings')
+    with tempfile.TemporaryDirectory() as directory:
+        if not env.get('DB_HOST'):
+            env['SQLITE_PATH'] = os.path.join(directory, 'db.sqlite3')
+            env['RATE_GRID_DIR'] = directory
+            prepare_database(env, args.quates)
+
+        url = f'http://127.0.0.1:{args.port}/api/quate/quates/'
+        for name, (mode_env, command) in modes(
+                args.port, args.workers, args.threads).items():
+            if args.mode and name not in args.mode:
+                continue
+
+            server = subprocess.Popen(
+                command, env=dict(env, **mode_env),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port(args.port)
+                results = asyncio.run(concurrency.run(
+                    url, args.connections, args.duration, 0
+                ))
+            finally:
+                server.terminate()
+                server.wait()
+
+            latencies = results['latencies'] or [0]
+            print(
+                f'{name:10} '
+                f'{len(results["latencies"]) / args.duration:8.1f} req/s  '
+                f'p50 {percentile(latencies, 50) * 1000:8.1f} ms  '
+                f'p99 {percentile(latencies, 99) * 1000:8.1f} ms  '
+                f'errors {results["errors"]}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Signup burst against the sync and the async (offloaded) create view
+
+Sends a burst of concurrent signups through the ASGI handler while a
+client keeps polling a quate, and reports how long the burst took and
+how long the polls were held up.
+
+    python -m benchmarks.signup --signups 32
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import percentile, setup, test_database
+
+
+URLCONFS = {
+    'sync view': 'app.urls',
+    'async view': 'app.urls_async',
+}
+
+
+async def burst(signups, offset, quate_url):
+    """Run the signups concurrently with a poller"""
+    from django.test import AsyncClient
+
+    api = AsyncClient()
+    done = asyncio.Event()
+    polls = []
+
+    async def signup(number):
+        res = await api.post('/api/user/create/', {
+            'email': f'user{offset + number}@rainwalk.io',
+            'password': 'password12345',
+            'name': 'Name',
+        }, content_type='application/json')
+        assert res.status_code == 201, res.content
+
+    async def poll():
+        while not done.is_set():
+            start = time.perf_counter()
+            await api.get(quate_url)
+            polls.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    poller = asyncio.ensure_future(poll())
+    start = time.perf_counter()
+    await asyncio.gather(*(signup(number) for number in range(signups)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await poller
+
+    return elapsed, polls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--signups', type=int, default=32)
+    args = parser.parse_args()
+
+    setup()
+    from django.test import override_settings
+    from core.models import Quate
+
+    with test_database():
+        quate_url = f'/api/quate/quates/{Quate.objects.create().quate_id}/'
+        for number, (name, urlconf) in enumerate(URLCONFS.items()):
+            with override_settings(ROOT_URLCONF=urlconf):
+                elapsed, polls = asyncio.run(
+                    burst(args.signups, number * args.signups, quate_url)
+                )
+
+            print(
+                f'{name:10} {args.signups / elapsed:6.1f} signups/s  '
+                f'poll p50 {percentile(polls, 50) * 1000:7.1f} ms  '
+                f'poll p99 {percentile(polls, 99) * 1000:7.1f} ms'
+            )
+
+
+if __name__ == '__main__':
+    main()
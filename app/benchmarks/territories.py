@@ -0,0 +1,59 @@
+"""Cost of rating the location of a policy holder
+
+Times looking up the territory of random ZIP codes in the index of the
+rate tables (see core.territories), next to the state lookup it falls
+back to, and the whole location relativity of the rater.
+
+    python -m benchmarks.territories --lookups 1000000
+"""
+import argparse
+import random
+import time
+
+from benchmarks import setup
+
+
+def per_lookup(func, values):
+    """Return the nanoseconds func takes per value"""
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+
+    return (time.perf_counter() - start) / len(values) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lookups', type=int, default=1000000)
+    parser.add_argument('--table-version', default='2021.2')
+    args = parser.parse_args()
+
+    setup()
+    from core.constants import factor_tables
+    from core.rating import Rater
+
+    rater = Rater(args.table_version)
+    index = rater.territories
+    zipcodes = [f'{random.randrange(100000):05}' for _ in range(args.lookups)]
+    # Half the ZIP codes from inside a territory
+    for position in range(0, args.lookups, 2):
+        first = int(index.firsts[position % len(index)])
+        last = int(index.lasts[position % len(index)])
+        zipcodes[position] = f'{random.randint(first, last):05}'
+    states = [random.choice(factor_tables.STATES) for _ in zipcodes]
+    pairs = list(zip(states, zipcodes))
+
+    print(f'{len(index)} ZIP ranges, '
+          f'{sum(map(bool, map(index.lookup, zipcodes)))} in a territory')
+    print(f'territory lookup    {per_lookup(index.lookup, zipcodes):6.0f} '
+          f'ns')
+    print(f'state lookup        '
+          f'{per_lookup(rater.state_relativity, states):6.0f} ns')
+    location = per_lookup(
+        lambda pair: rater.location_relativity(*pair), pairs
+    )
+    print(f'location relativity {location:6.0f} ns')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Compare text and native UUID primary keys: index size and join speed
+
+Builds a quate-like table and a policy-like table referencing it twice,
+once keyed by the 36 character text the keys used to be stored as and
+once by the database's UUIDField column type, then reports the size of
+the key indexes and the time of a join over all the rows.
+
+    python -m benchmarks.uuid_keys --rows 200000
+
+Run it against PostgreSQL (with the DB_* environment variables) to see
+the 16 byte uuid type, SQLite stores UUIDField as 32 hex characters.
+"""
+import argparse
+import uuid
+
+from benchmarks import setup, test_database, timeit
+
+
+def create_tables(cursor, key_type, suffix):
+    cursor.execute(
+        f'CREATE TABLE bench_quate_{suffix} '
+        f'(quate_id {key_type} PRIMARY KEY, pet_name varchar(255))'
+    )
+    cursor.execute(
+        f'CREATE TABLE bench_policy_{suffix} '
+        f'(policy_id integer PRIMARY KEY, '
+        f'quate_id {key_type} REFERENCES bench_quate_{suffix} (quate_id))'
+    )
+    cursor.execute(
+        f'CREATE INDEX bench_policy_{suffix}_quate '
+        f'ON bench_policy_{suffix} (quate_id)'
+    )
+
+
+def fill_tables(cursor, suffix, keys):
+    cursor.executemany(
+        f'INSERT INTO bench_quate_{suffix} VALUES (%s, %s)',
+        [(key, 'Max') for key in keys]
+    )
+    cursor.executemany(
+        f'INSERT INTO bench_policy_{suffix} VALUES (%s, %s)',
+        list(enumerate(keys))
+    )
+
+
+def index_sizes(cursor, vendor, suffix):
+    """Bytes of the primary key index and the foreign key index"""
+    if vendor == 'postgresql':
+        cursor.execute(
+            'SELECT pg_relation_size(%s), pg_relation_size(%s)',
+            [f'bench_quate_{suffix}_pkey', f'bench_policy_{suffix}_quate']
+        )
+        return cursor.fetchone()
+
+    # SQLite names the primary key index after the table
+    cursor.execute(
+        "SELECT name, SUM(pgsize) FROM dbstat "
+        "WHERE name IN (%s, %s) GROUP BY name",
+        [f'sqlite_autoindex_bench_quate_{suffix}_1',
+         f'bench_policy_{suffix}_quate']
+    )
+    sizes = dict(cursor.fetchall())
+    return (sizes[f'sqlite_autoindex_bench_quate_{suffix}_1'],
+            sizes[f'bench_policy_{suffix}_quate'])
+
+
+def join(cursor, suffix):
+    cursor.execute(
+        f'SELECT COUNT(q.pet_name) FROM bench_policy_{suffix} p '
+        f'JOIN bench_quate_{suffix} q ON q.quate_id = p.quate_id'
+    )
+    return cursor.fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.db.models import UUIDField
+
+    keys = [uuid.uuid4() for _ in range(args.rows)]
+    field = UUIDField()
+    variants = {
+        'text': ('varchar(255)', [str(key) for key in keys]),
+        'uuid': (
+            field.db_type(connection),
+            [field.get_db_prep_value(key, connection) for key in keys],
+        ),
+    }
+
+    with test_database(), connection.cursor() as cursor:
+        for suffix, (key_type, values) in variants.items():
+            create_tables(cursor, key_type, suffix)
+            fill_tables(cursor, suffix, values)
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'ANALYZE bench_quate_{suffix}')
+                cursor.execute(f'ANALYZE bench_policy_{suffix}')
+
+            primary, foreign = index_sizes(cursor, connection.vendor, suffix)
+            seconds = timeit(join, cursor, suffix)
+            print(f'{suffix:5} {key_type:13} '
+                  f'pk index {primary / 2 ** 20:7.2f} MiB  '
+                  f'fk index {foreign / 2 ** 20:7.2f} MiB  '
+                  f'join {seconds * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from core.models import BillingBot
 
 import datetime
 
@@ -19,3 +22,57 @@ class PaymentUnitTest(TestCase):
             self.user.has_paid_for_current_month(),
             "Initial user should have empty paid_until attr",
         )
+
+    def test_has_paid_is_checked_now(self):
+        """Test the payment is checked against the current time"""
+        self.user.paid_until = timezone.now() + datetime.timedelta(hours=1)
+
+        self.assertTrue(self.user.has_paid_for_current_month())
+
+        self.user.paid_until = timezone.now() - datetime.timedelta(hours=1)
+
+        self.assertFalse(self.user.has_paid_for_current_month())
+
+    def test_has_paid_as_of_date(self):
+        """Test a date is compared to the start of that day"""
+        self.user.paid_until = timezone.make_aware(
+            datetime.datetime(2021, 3, 1, 12)
+        )
+
+        self.assertTrue(
+            self.user.has_paid_for_current_month(datetime.date(2021, 3, 1))
+        )
+        self.assertFalse(
+            self.user.has_paid_for_current_month(datetime.date(2021, 3, 2))
+        )
+
+    def test_billing_bot_without_payment(self):
+        """Test a billing bot that never paid is not paid"""
+        bot = BillingBot.objects.create(user=self.user)
+
+        self.assertFalse(bot.has_paid_for_current_month())
+
+    def test_paid_as_of(self):
+        """Test filtering users by payment in the database"""
+        moment = timezone.make_aware(datetime.datetime(2021, 3, 1))
+        paid = get_user_model().objects.create_user(
+            'paid@rainwalk.io', 'password12345',
+            paid_until=moment + datetime.timedelta(days=30),
+        )
+        lapsed = get_user_model().objects.create_user(
+            'lapsed@rainwalk.io', 'password12345',
+            paid_until=moment - datetime.timedelta(days=1),
+        )
+        users = get_user_model().objects
+
+        self.assertEqual(list(users.paid_as_of(moment)), [paid])
+        self.assertCountEqual(
+            users.unpaid_as_of(moment), [self.user, lapsed]
+        )
+        BillingBot.objects.create(user=paid, paid_until=paid.paid_until)
+        BillingBot.objects.create(user=lapsed, paid_until=lapsed.paid_until)
+
+        self.assertEqual(
+            BillingBot.objects.paid_as_of(datetime.date(2021, 3, 1)).get()
+            .user, paid
+        )
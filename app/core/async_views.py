@@ -0,0 +1,64 @@
+"""Serve the DRF views as async views from the ASGI app
+
+Django runs a sync view served over ASGI on a single shared thread, so
+one slow request holds up every other request of the worker. DRF has no
+async views, so instead the views are wrapped in async views that run
+them, response rendering included, on a bounded pool of API threads.
+The event loop is left free to hold many slow clients at once.
+"""
+import asyncio
+import functools
+
+from django.conf import settings
+from django.urls import URLPattern, URLResolver
+
+from core import instrumentation
+from core.executors import get_executor, run_in_executor
+
+
+def api_executor():
+    """Return the process wide pool running the API views"""
+    return get_executor('api', settings.API_WORKER_THREADS)
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render') and callable(response.render):
+        response = instrumentation.render(response)
+
+    return response
+
+
+def async_view(view):
+    """Return an async view running the given sync view on the API pool"""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await run_in_executor(
+            api_executor(), _render, view, request, *args, **kwargs
+        )
+
+    return wrapper
+
+
+def async_urlpatterns(urlpatterns):
+    """Return a copy of urlpatterns with every view made async"""
+    patterns = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                async_urlpatterns(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif not asyncio.iscoroutinefunction(pattern.callback):
+            pattern = URLPattern(
+                pattern.pattern,
+                async_view(pattern.callback),
+                pattern.default_args,
+                pattern.name,
+            )
+        patterns.append(pattern)
+
+    return patterns
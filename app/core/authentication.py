@@ -0,0 +1,36 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache():
+    """Return the cache that keeps token lookups"""
+    return caches[settings.AUTH_TOKEN_CACHE]
+
+
+def token_cache_key(key):
+    """Cache key for a token, hashed so raw tokens never reach the cache"""
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_tokens(*keys):
+    """Forget the cached lookups of the given token keys"""
+    token_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token to user lookup"""
+
+    def authenticate_credentials(self, key):
+        cache = token_cache()
+        cache_key = token_cache_key(key)
+
+        credentials = cache.get(cache_key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            cache.set(cache_key, credentials)
+
+        return credentials
@@ -0,0 +1,167 @@
+"""PostgreSQL backend with connection health checks and pooling
+
+Use it as the ENGINE of a database in settings. On top of Django's own
+backend it understands two extra keys in the database settings:
+
+CONN_HEALTH_CHECKS
+    Check a persistent connection still works the first time it is used
+    by a request, and reconnect if the server dropped it.
+
+POOL_OPTIONS
+    A dict with MIN_CONNS, MAX_CONNS and TIMEOUT. When set, connections
+    are borrowed from a process wide pool and returned to it when Django
+    closes them, so a request never pays for the TCP and auth handshake.
+    A thread finding every connection taken waits up to TIMEOUT seconds
+    for one to be returned. With CONN_HEALTH_CHECKS a borrowed
+    connection is checked before use, and replaced if it is broken.
+    Use CONN_MAX_AGE = 0 with a pool, so every request returns its
+    connection rather than keeping it to its thread.
+"""
+import os
+import threading
+import time
+
+import psycopg2.extras
+from psycopg2 import pool
+
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """Thread safe pool waiting for a free connection when all are taken
+
+    psycopg2's own pool raises PoolError as soon as it is exhausted.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        # minconn connections are opened up front, past that psycopg2
+        # closes the connections returned once minconn are idle. Keep
+        # them all open, as every request returns its connection.
+        self.minconn = maxconn
+        self.timeout = timeout
+        self._returned = threading.Condition(self._lock)
+
+    def getconn(self, key=None):
+        deadline = time.monotonic() + self.timeout
+        with self._returned:
+            while (key is None and not self.closed and not self._pool and
+                   len(self._used) >= self.maxconn):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise pool.PoolError(
+                        f'no connection returned to the pool within '
+                        f'{self.timeout}s, all {self.maxconn} are in use'
+                    )
+                self._returned.wait(remaining)
+
+            return self._getconn(key)
+
+    def putconn(self, conn=None, key=None, close=False):
+        with self._returned:
+            self._putconn(conn, key, close)
+            self._returned.notify()
+
+
+def get_pool(alias, conn_params, options):
+    """Return the connection pool of a database, one per process"""
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = BlockingConnectionPool(
+                options.get('MIN_CONNS', 1),
+                options['MAX_CONNS'],
+                options.get('TIMEOUT', 5),
+                **conn_params
+            )
+
+    return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'CONN_HEALTH_CHECKS', False
+        )
+        self.health_check_done = False
+        self.pool_options = self.settings_dict.get('POOL_OPTIONS')
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        if not self.pool_options:
+            return super().get_new_connection(conn_params)
+
+        connection = self.borrow(
+            get_pool(self.alias, conn_params, self.pool_options)
+        )
+
+        # Same session setup as Django does for a brand new connection
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection,
+            loads=lambda x: x
+        )
+        return connection
+
+    def borrow(self, connection_pool):
+        """Take a connection from the pool, replacing the broken ones"""
+        # Each broken connection is dropped from the pool, so once the
+        # idle ones are used up the pool opens new connections
+        attempts = connection_pool.maxconn + 1
+        for attempt in range(attempts):
+            connection = connection_pool.getconn()
+            if not self.health_check_enabled:
+                return connection
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                # Leave no transaction open outside of autocommit
+                connection.rollback()
+            except psycopg2.Error:
+                connection_pool.putconn(connection, close=True)
+                if attempt == attempts - 1:
+                    raise
+            else:
+                return connection
+
+    def _close(self):
+        if not self.pool_options or self.connection is None:
+            return super()._close()
+
+        connection_pool = get_pool(
+            self.alias, self.get_connection_params(), self.pool_options
+        )
+        with self.wrap_database_errors:
+            connection_pool.putconn(
+                self.connection,
+                close=self.connection.closed or self.errors_occurred
+            )
+
+    def ensure_connection(self):
+        """Drop a persistent connection the server closed before using it"""
+        if (self.health_check_enabled and not self.health_check_done and
+                self.connection is not None and not self.in_atomic_block):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """Called at the start and end of every request"""
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
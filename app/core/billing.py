@@ -0,0 +1,231 @@
+"""Monthly renewal of billing bots
+
+A billing run streams the bots that are due and renews them in fixed
+size batches, each committed in its own transaction. After every batch
+the last renewed bot is written to a checkpoint file, so a run that
+crashes picks up where it stopped instead of starting over.
+
+Large runs are split into shards by a hash of bot_id and renewed by a
+pool of worker processes. Sharded runs lock the rows they renew, so
+several hosts can run the same shards without charging a bot twice.
+"""
+import calendar
+import datetime
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+from django.db import connections, transaction
+
+from core.models import BillingBot, User, as_of
+
+
+def add_months(moment, months=1):
+    """Move a datetime by whole months, clamping the day to the month"""
+    month = moment.month - 1 + months
+    year = moment.year + month // 12
+    month = month % 12 + 1
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+
+    return moment.replace(year=year, month=month, day=day)
+
+
+def renewal_date(paid_until, moment):
+    """A renewal buys one month from the later of paid_until and now"""
+    if paid_until is None or paid_until < moment:
+        paid_until = moment
+
+    return add_months(paid_until)
+
+
+class Checkpoint:
+    """Progress of a billing run, kept in a small JSON file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """Return the saved (as_of, last_pk), or None without a checkpoint"""
+        try:
+            with open(self.path) as checkpoint_file:
+                state = json.load(checkpoint_file)
+        except FileNotFoundError:
+            return None
+
+        return (datetime.datetime.fromisoformat(state['as_of']),
+                state['last_pk'])
+
+    def save(self, moment, last_pk):
+        """Write the checkpoint, replacing the old one atomically"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as checkpoint_file:
+            json.dump({'as_of': moment.isoformat(), 'last_pk': str(last_pk)},
+                      checkpoint_file)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def renew_batch(bots, moment):
+    """Renew a batch of (pk, paid_until, user_id) rows in one transaction
+
+    Bots are grouped by their new paid_until, which due bots mostly
+    share, so a batch takes an UPDATE per distinct date rather than the
+    per-row CASE expression of bulk_update.
+    """
+    renewals = defaultdict(lambda: ([], []))
+    for pk, paid_until, user_id in bots:
+        bot_pks, user_pks = renewals[renewal_date(paid_until, moment)]
+        bot_pks.append(pk)
+        user_pks.append(user_id)
+
+    with transaction.atomic():
+        for paid_until, (bot_pks, user_pks) in renewals.items():
+            BillingBot.objects.filter(pk__in=bot_pks).update(
+                paid_until=paid_until
+            )
+            User.objects.filter(pk__in=user_pks).update(
+                paid_until=paid_until
+            )
+
+
+def _batches(rows, batch_size):
+    """Group a stream of rows into lists of batch_size"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def billing_run(moment=None, checkpoint=None, chunk_size=2000,
+                batch_size=500, queryset=None, progress=None, lock=False):
+    """Renew every bot that is unpaid as of a moment
+
+    Returns the number of bots renewed and the seconds it took. The bots
+    are streamed with a server side cursor where the database has one,
+    so memory stays flat however many bots are due. `progress` is called
+    after every batch with the running count and elapsed seconds.
+
+    With `lock`, every batch is instead read with SELECT ... FOR UPDATE
+    SKIP LOCKED in the transaction renewing it, so runs over the same
+    bots on other processes or hosts never renew a bot twice.
+    """
+    moment = as_of(moment)
+    last_pk = None
+    if checkpoint is not None:
+        saved = checkpoint.load()
+        if saved is not None:
+            moment, last_pk = saved
+
+    bots = (queryset if queryset is not None else BillingBot.objects.all())
+    bots = bots.unpaid_as_of(moment).order_by('pk').values_list(
+        'pk', 'paid_until', 'user_id'
+    )
+
+    renewed = 0
+    started = time.monotonic()
+
+    def renewed_batch(batch):
+        nonlocal renewed, last_pk
+        renewed += len(batch)
+        last_pk = batch[-1][0]
+        if checkpoint is not None:
+            checkpoint.save(moment, last_pk)
+        if progress is not None:
+            progress(renewed, time.monotonic() - started)
+
+    if lock:
+        locked = bots.select_for_update(skip_locked=True)
+        while True:
+            with transaction.atomic():
+                if last_pk is not None:
+                    batch = locked.filter(pk__gt=last_pk)[:batch_size]
+                else:
+                    batch = locked[:batch_size]
+                batch = list(batch)
+                if not batch:
+                    break
+                renew_batch(batch, moment)
+            renewed_batch(batch)
+    else:
+        if last_pk is not None:
+            bots = bots.filter(pk__gt=last_pk)
+        for batch in _batches(bots.iterator(chunk_size=chunk_size),
+                              batch_size):
+            renew_batch(batch, moment)
+            renewed_batch(batch)
+
+    if checkpoint is not None:
+        checkpoint.clear()
+
+    return renewed, time.monotonic() - started
+
+
+def shard_checkpoint(path, shard, shards):
+    """Checkpoint of one shard of a sharded run"""
+    if path is None:
+        return None
+
+    return Checkpoint(f'{path}.{shard}-of-{shards}')
+
+
+def run_shard(shard, shards, moment, checkpoint_path=None, **options):
+    """Renew the due bots of one shard, locking them as it goes"""
+    return billing_run(
+        moment,
+        checkpoint=shard_checkpoint(checkpoint_path, shard, shards),
+        queryset=BillingBot.objects.in_shard(shard, shards),
+        lock=True,
+        **options
+    )
+
+
+def _run_shard_in_worker(args):
+    shard, shards, moment, checkpoint_path, options = args
+    try:
+        return run_shard(shard, shards, moment, checkpoint_path, **options)
+    finally:
+        connections.close_all()
+
+
+def run_shards(workers, shards=None, moment=None, checkpoint_path=None,
+               **options):
+    """Renew the due bots with a pool of worker processes
+
+    The bots are split into `shards` by their bucket, one per worker by
+    default, and every worker takes shards off the queue until all are
+    done. Returns the total renewed and the seconds it took.
+    """
+    shards = shards or workers
+    moment = as_of(moment)
+    started = time.monotonic()
+
+    if workers == 1:
+        results = [
+            run_shard(shard, shards, moment, checkpoint_path, **options)
+            for shard in range(shards)
+        ]
+    else:
+        tasks = [
+            (shard, shards, moment, checkpoint_path, options)
+            for shard in range(shards)
+        ]
+        # Forked workers must open their own database connections
+        connections.close_all()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(_run_shard_in_worker, tasks, chunksize=1)
+
+    return (sum(renewed for renewed, _ in results),
+            time.monotonic() - started)
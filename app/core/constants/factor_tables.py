@@ -0,0 +1,69 @@
+"""Rating factor lookup tables compiled once from the choice lists
+
+Choice values carry trailing (non-breaking) spaces and human readable
+amounts like '$1,000'. Everything here is parsed at import so rating
+code only does dict and tuple lookups.
+"""
+from core.constants.age_list import AGE_LIST
+from core.constants.breed_list import BREED_LIST
+from core.constants.policy_limit_factor_list import POLICY_LIMIT_FACTOR_LIST
+from core.constants.states import ARMED_FORCES_STATES, CONTIGUOUS_STATES, \
+                                   NON_CONTIGUOUS_STATES, US_TERRITORIES
+
+
+SPECIES = ('Dog', 'Cat')
+SPECIES_CODES = {species: code for code, species in enumerate(SPECIES)}
+
+# The states of User.state, with '' for an unknown state
+STATES = ('',) + tuple(sorted(
+    code for code, _ in (CONTIGUOUS_STATES + NON_CONTIGUOUS_STATES +
+                         US_TERRITORIES + ARMED_FORCES_STATES)
+))
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+GENDERS = ('Male', 'Female')
+GENDER_CODES = {gender: code for code, gender in enumerate(GENDERS)}
+
+
+def _age_in_years(age):
+    """Turn an age choice like '3 years' into a number of years"""
+    if age.startswith('0-1'):
+        return 0
+
+    return int(age.split()[0])
+
+
+def _limit_amount(limit):
+    """Turn a limit choice like '$1,000' into dollars, None if unlimited"""
+    if not limit.startswith('$'):
+        return None
+
+    return int(limit[1:].replace(',', ''))
+
+
+def _breed_tables():
+    """Number the breeds and note the species each one belongs to"""
+    codes = {}
+    names = []
+    species_codes = []
+    for species, breeds in BREED_LIST:
+        for breed, _ in breeds:
+            codes[breed] = len(names)
+            names.append(breed.strip())
+            species_codes.append(SPECIES_CODES[species])
+
+    return codes, tuple(names), tuple(species_codes)
+
+
+# Breed choice value -> code, with the code indexing the tuples below
+BREED_CODES, BREED_NAMES, BREED_SPECIES = _breed_tables()
+
+# Age choice value -> code, ages are the same for every species
+AGES = tuple(age for age, _ in dict(AGE_LIST)[SPECIES[0]])
+AGE_CODES = {age: code for code, age in enumerate(AGES)}
+AGE_YEARS = tuple(_age_in_years(age) for age in AGES)
+
+# Policy limit choice value -> code
+LIMITS = tuple(limit for limit, _ in POLICY_LIMIT_FACTOR_LIST)
+LIMIT_CODES = {limit: code for code, limit in enumerate(LIMITS)}
+LIMIT_AMOUNTS = tuple(_limit_amount(limit) for limit in LIMITS)
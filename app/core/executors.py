@@ -0,0 +1,50 @@
+"""Bounded thread pools for running blocking work from async views
+
+Each pool is created on first use and lives as long as the process.
+Work run on a pool gets Django's per-request database connection
+handling, as the request signals fire on another thread, and runs in a
+copy of the context of the caller, so context variables such as the
+request timings of core.instrumentation carry over.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name, max_workers):
+    """Return the named pool of the process"""
+    with _executors_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=name,
+            )
+
+    return _executors[name]
+
+
+def _run(func, *args, **kwargs):
+    """Run func and tidy up the database connection of the pool thread"""
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_executor(executor, func, *args, **kwargs):
+    """Await func called on the given pool"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        executor,
+        functools.partial(context.run, _run, func, *args, **kwargs)
+    )
@@ -0,0 +1,172 @@
+"""Full dumps of the book of business for the actuarial team
+
+The policies, or the quates, are streamed in primary key order joined
+to the state of their user, and written chunk by chunk, so memory stays
+flat however many rows there are. Rows are read with a server side
+cursor where the database has one (PostgreSQL), otherwise in chunks.
+
+Two formats are written:
+
+    - csv, one header row then a line per row
+    - parquet, one row group per chunk, which needs pyarrow installed
+      (see requirements-export.txt)
+"""
+import csv
+import itertools
+import time
+
+from django.db.models.constants import LOOKUP_SEP
+
+from core.models import Policy, Quate
+
+
+FORMATS = ('csv', 'parquet')
+
+# The rating factors of a quate, as stored
+QUATE_FIELDS = [field.attname for field in Quate._meta.concrete_fields]
+
+# Column name and lookup of every table that can be exported
+TABLES = {
+    'policies': (Policy, [
+        ('policy_number', 'policy_number'),
+        ('policy_premium', 'policy_premium'),
+        ('user_id', 'user_id'),
+        ('state', 'user__state'),
+    ] + [
+        (name, f'policy_quate_number__{name}') for name in QUATE_FIELDS
+    ]),
+    # Quates are bound to a user through their policy, the ones without
+    # a policy have no policy_number nor state
+    'quates': (Quate, [
+        (name, name) for name in QUATE_FIELDS
+    ] + [
+        ('policy_number', 'policy__policy_number'),
+        ('state', 'policy__user__state'),
+    ]),
+}
+
+
+def lookup_field(model, lookup):
+    """Return the model field a values() lookup such as user__state reads"""
+    *relations, name = lookup.split(LOOKUP_SEP)
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    if field.is_relation:
+        field = field.target_field
+
+    return field
+
+
+class CSVWriter:
+    """Write rows to a CSV file"""
+
+    def __init__(self, path, model, columns):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Write rows to a Parquet file, one row group per chunk"""
+
+    def __init__(self, path, model, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ValueError(
+                'Writing parquet files needs pyarrow installed, '
+                'pip install -r requirements-export.txt'
+            )
+
+        self.pyarrow = pyarrow
+        fields = [lookup_field(model, lookup) for _, lookup in columns]
+        self.schema = pyarrow.schema([
+            (name, self.arrow_type(field))
+            for (name, _), field in zip(columns, fields)
+        ])
+        # Arrow has no UUID type, they are kept as their text
+        self.as_text = [
+            index for index, field in enumerate(fields)
+            if field.get_internal_type() == 'UUIDField'
+        ]
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def arrow_type(self, field):
+        pyarrow = self.pyarrow
+        internal_type = field.get_internal_type()
+        if internal_type == 'DecimalField':
+            return pyarrow.decimal128(field.max_digits, field.decimal_places)
+        if internal_type == 'BooleanField':
+            return pyarrow.bool_()
+        if internal_type == 'DateTimeField':
+            return pyarrow.timestamp('us', tz='UTC')
+        if internal_type.endswith(('IntegerField', 'AutoField')):
+            return pyarrow.int64()
+
+        return pyarrow.string()
+
+    def write(self, rows):
+        columns = [list(column) for column in zip(*rows)]
+        for index in self.as_text:
+            columns[index] = [
+                None if value is None else str(value)
+                for value in columns[index]
+            ]
+        self.writer.write_table(
+            self.pyarrow.Table.from_arrays(
+                [
+                    self.pyarrow.array(column, type=field.type)
+                    for column, field in zip(columns, self.schema)
+                ],
+                schema=self.schema,
+            )
+        )
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    'csv': CSVWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def export_book(table, path, file_format='csv', chunk_size=10000,
+                queryset=None, progress=None):
+    """Write every row of a table to a file
+
+    Returns the number of rows written and the seconds it took.
+    `progress` is called after every chunk with the running count and
+    elapsed seconds.
+    """
+    model, columns = TABLES[table]
+    rows = queryset if queryset is not None else model.objects.all()
+    rows = rows.order_by('pk').values_list(
+        *[lookup for _, lookup in columns]
+    ).iterator(chunk_size=chunk_size)
+
+    written = 0
+    started = time.monotonic()
+    writer = WRITERS[file_format](path, model, columns)
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            writer.write(chunk)
+            written += len(chunk)
+            if progress is not None:
+                progress(written, time.monotonic() - started)
+    finally:
+        writer.close()
+
+    return written, time.monotonic() - started
@@ -0,0 +1,34 @@
+"""Password hashers with cost parameters taken from settings
+
+They keep the algorithm names of Django's hashers, so existing hashes
+still verify. When the configured cost changes, `must_update` makes
+Django rehash a password with the new cost the next time its user logs
+in, as `check_password` saves the new hash for us.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, \
+                                        PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 with the iterations set by settings.PBKDF2_ITERATIONS"""
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 with the costs set by the settings.ARGON2_* settings"""
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
@@ -0,0 +1,342 @@
+"""Per-endpoint query count and timing of the API
+
+InstrumentationMiddleware times a sample of the requests, the share
+given by INSTRUMENTATION_SAMPLE_RATE, so it can stay on in production.
+A sampled request records
+
+    - the number of queries and the time spent running them
+    - the time spent turning model instances into data by the
+      serializers using TimedSerializerMixin, queries run on the way
+      included
+    - the time spent rendering the response, which is where DRF
+      encodes the data to JSON
+    - the total time spent in the view and the inner middleware
+
+and sends them back in a Server-Timing header, which browsers show
+along the network timings. The totals of every endpoint are served in
+the Prometheus text format by metrics_view.
+
+The totals are kept per process, so with several gunicorn workers each
+scrape reads the worker that happens to take it. Both the totals and
+the header tell how long the queries of an endpoint take, so they only
+go to staff users, or to requests sending the METRICS_TOKEN setting as
+a bearer token.
+"""
+import asyncio
+import contextvars
+import hmac
+import random
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.deprecation import MiddlewareMixin
+
+
+# Upper bounds of the request duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Endpoint of the requests that matched no URL
+UNMATCHED = '<unmatched>'
+
+_timings = contextvars.ContextVar('timings', default=None)
+
+
+class Timings:
+    """What a sampled request spent its time on, in seconds"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        # Whether a serializer is being timed, so the serializers nested
+        # in it are not counted twice
+        self.serializing = False
+
+    def stop(self):
+        self.total = time.perf_counter() - self.start
+
+    def server_timing(self):
+        """Return the value of the Server-Timing header"""
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'render;dur={self.render * 1000:.1f}',
+            f'total;dur={self.total * 1000:.1f}',
+        ])
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing the queries of sampled requests"""
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def install(connection):
+    """Time the queries run on the connection"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def render(response):
+    """Render the response, timing it if the request is sampled"""
+    timings = _timings.get()
+    if timings is None:
+        return response.render()
+
+    start = time.perf_counter()
+    try:
+        return response.render()
+    finally:
+        timings.render += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """Time turning instances into data for the sampled requests
+
+    Goes before the DRF serializer class in the bases. The items of a
+    list are timed one by one, as DRF builds the list of a ListSerializer
+    from the representation of each of them.
+    """
+
+    def to_representation(self, instance):
+        timings = _timings.get()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+
+        timings.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serialize += time.perf_counter() - start
+            timings.serializing = False
+
+
+class Metrics:
+    """Totals of the requests of each endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # Counted for every request
+            self.requests = {}
+            # Sums of the sampled requests
+            self.sampled = {}
+            self.queries = {}
+            self.db = {}
+            self.serialize = {}
+            self.render = {}
+            self.duration = {}
+            self.buckets = {}
+
+    def count(self, endpoint):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def observe(self, endpoint, timings):
+        with self.lock:
+            self.sampled[endpoint] = self.sampled.get(endpoint, 0) + 1
+            self.queries[endpoint] = (
+                self.queries.get(endpoint, 0) + timings.queries
+            )
+            self.db[endpoint] = self.db.get(endpoint, 0.0) + timings.db
+            self.serialize[endpoint] = (
+                self.serialize.get(endpoint, 0.0) + timings.serialize
+            )
+            self.render[endpoint] = (
+                self.render.get(endpoint, 0.0) + timings.render
+            )
+            self.duration[endpoint] = (
+                self.duration.get(endpoint, 0.0) + timings.total
+            )
+            buckets = self.buckets.setdefault(
+                endpoint, [0] * len(DURATION_BUCKETS)
+            )
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if timings.total <= bound:
+                    buckets[i] += 1
+
+    def exposition(self):
+        """Return the totals in the Prometheus text format"""
+        with self.lock:
+            lines = []
+
+            def counter(name, help, values):
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} counter')
+                for endpoint, value in sorted(values.items()):
+                    lines.append(f'{name}{{{_labels(endpoint)}}} {value:g}')
+
+            counter('app_requests_total', 'Requests handled.',
+                    self.requests)
+            counter('app_sampled_requests_total', 'Requests instrumented.',
+                    self.sampled)
+            counter('app_request_queries_total',
+                    'Queries run by the sampled requests.', self.queries)
+            counter('app_request_db_seconds_total',
+                    'Time the sampled requests spent running queries.',
+                    self.db)
+            counter('app_request_serialize_seconds_total',
+                    'Time the sampled requests spent serializing data.',
+                    self.serialize)
+            counter('app_request_render_seconds_total',
+                    'Time the sampled requests spent rendering responses.',
+                    self.render)
+
+            name = 'app_request_duration_seconds'
+            lines.append(f'# HELP {name} Duration of the sampled requests.')
+            lines.append(f'# TYPE {name} histogram')
+            for endpoint, buckets in sorted(self.buckets.items()):
+                labels = _labels(endpoint)
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    lines.append(
+                        f'{name}_bucket{{{labels},le="{bound:g}"}} {count}'
+                    )
+                count = self.sampled[endpoint]
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(
+                    f'{name}_sum{{{labels}}} {self.duration[endpoint]:g}'
+                )
+                lines.append(f'{name}_count{{{labels}}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(endpoint):
+    endpoint = endpoint.replace('\\', '\\\\').replace('"', '\\"')
+    return f'endpoint="{endpoint}"'
+
+
+metrics = Metrics()
+
+
+def endpoint(request):
+    """Return the name the request is counted under, e.g. quate:quate-list"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED
+
+    return match.view_name
+
+
+def sampled():
+    """Return whether to instrument the next request"""
+    rate = settings.INSTRUMENTATION_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class InstrumentationMiddleware(MiddlewareMixin):
+    """Count every request and time a sample of them"""
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        if not sampled():
+            response = self.get_response(request)
+            metrics.count(endpoint(request))
+            return response
+
+        timings = Timings()
+        token = _timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+
+        return self.finish(request, response, timings,
+                           self.show_timings(request))
+
+    async def __acall__(self, request):
+        if not sampled():
+            response = await self.get_response(request)
+            metrics.count(endpoint(request))
+            return response
+
+        # The async views run the sync ones on the API pool, which gets
+        # a copy of this context (see core.executors), so the queries
+        # and rendering done there are timed as well
+        timings = Timings()
+        token = _timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+
+        # Telling staff users apart may load the user of the session
+        show = (settings.INSTRUMENTATION_SERVER_TIMING and
+                await sync_to_async(metrics_allowed)(request))
+
+        return self.finish(request, response, timings, show)
+
+    def process_template_response(self, request, response):
+        """Time rendering the response, done after the middleware returns"""
+        timings = _timings.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.render += time.perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+
+        return response
+
+    @staticmethod
+    def show_timings(request):
+        """Return whether to send the timings back with the response"""
+        return (settings.INSTRUMENTATION_SERVER_TIMING and
+                metrics_allowed(request))
+
+    def finish(self, request, response, timings, show):
+        timings.stop()
+        name = endpoint(request)
+        metrics.count(name)
+        metrics.observe(name, timings)
+        if show:
+            response['Server-Timing'] = timings.server_timing()
+
+        return response
+
+
+def metrics_allowed(request):
+    """Return whether the request may read the metrics and timings"""
+    token = settings.METRICS_TOKEN
+    if token:
+        scheme, _, given = request.headers.get(
+            'Authorization', ''
+        ).partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(
+                given.strip().encode(), token.encode()):
+            return True
+
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_active and user.is_staff
+
+
+def metrics_view(request):
+    """Serve the totals of the endpoints to Prometheus"""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        metrics.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
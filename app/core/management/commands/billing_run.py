@@ -0,0 +1,95 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.billing import Checkpoint, billing_run, run_shard, run_shards, \
+                         shard_checkpoint
+
+
+class Command(BaseCommand):
+    """Django command to renew the billing bots that are due"""
+
+    help = 'Renew every billing bot unpaid as of a date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--as-of', type=datetime.datetime.fromisoformat,
+            help='date or datetime to bill at, now by default',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='rows fetched per database round trip')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='bots renewed per transaction')
+        parser.add_argument(
+            '--checkpoint', default=settings.BILLING_RUN_CHECKPOINT,
+            help='file the progress is kept in to resume a crashed run',
+        )
+        parser.add_argument('--restart', action='store_true',
+                            help='ignore the checkpoint of an earlier run')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='worker processes renewing shards')
+        parser.add_argument('--shards', type=int,
+                            help='shards to split the bots in, one per '
+                                 'worker by default')
+        parser.add_argument('--shard', type=int,
+                            help='only renew this shard of --shards, to '
+                                 'split a run between hosts')
+
+    def handle(self, *args, **options):
+        shard = options['shard']
+        shards = options['shards']
+        sharded = options['workers'] > 1 or shards is not None
+        if shard is not None and (shards is None or
+                                  not 0 <= shard < shards):
+            raise CommandError('--shard must be below --shards')
+        if sharded:
+            shards = shards or options['workers']
+            selected = [shard] if shard is not None else range(shards)
+            checkpoints = [
+                shard_checkpoint(options['checkpoint'], selected_shard,
+                                 shards)
+                for selected_shard in selected
+            ]
+        else:
+            checkpoints = [Checkpoint(options['checkpoint'])]
+
+        if options['restart']:
+            for checkpoint in checkpoints:
+                checkpoint.clear()
+        elif any(checkpoint.load() for checkpoint in checkpoints):
+            self.stdout.write('Resuming from the last checkpoint...')
+
+        batch_options = {
+            'chunk_size': options['chunk_size'],
+            'batch_size': options['batch_size'],
+        }
+        if shard is not None:
+            renewed, seconds = run_shard(
+                shard, shards, options['as_of'], options['checkpoint'],
+                progress=self.report, **batch_options
+            )
+        elif sharded:
+            renewed, seconds = run_shards(
+                options['workers'], shards, options['as_of'],
+                options['checkpoint'], **batch_options
+            )
+        else:
+            renewed, seconds = billing_run(
+                options['as_of'], checkpoints[0], progress=self.report,
+                **batch_options
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Renewed {renewed} billing bots in {seconds:.1f}s '
+            f'({self.rate(renewed, seconds):.0f} rows/sec)'
+        ))
+
+    def report(self, renewed, seconds):
+        self.stdout.write(
+            f'{renewed} renewed, {self.rate(renewed, seconds):.0f} rows/sec'
+        )
+
+    @staticmethod
+    def rate(renewed, seconds):
+        return renewed / seconds if seconds else 0.0
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.rate_grid import build_grid, grid_path
+
+
+class Command(BaseCommand):
+    """Django command to precompute the premium grid of a rate table"""
+
+    help = 'Build the premium grid of a rate table version'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table-version',
+            default=settings.RATE_TABLE_VERSION,
+            help='rate table version, the active one by default',
+        )
+
+    def handle(self, *args, **options):
+        version = options['table_version']
+        grid = build_grid(version)
+        self.stdout.write(self.style.SUCCESS(
+            f'Built rate grid {version}: {grid.size} premiums '
+            f'in {grid_path(version)}'
+        ))
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import FORMATS, TABLES, export_book
+
+
+# Seconds between progress reports
+REPORT_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    """Django command to dump the policies or quates to a file"""
+
+    help = 'Stream every policy or quate, with the state of its user, ' \
+           'to a CSV or Parquet file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(TABLES),
+                            help='rows to export')
+        parser.add_argument('output', help='file to write')
+        parser.add_argument('--format', dest='file_format', choices=FORMATS,
+                            help='file format, guessed from the output '
+                                 'extension by default')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='rows fetched and written at a time')
+
+    def handle(self, *args, **options):
+        file_format = options['file_format']
+        if file_format is None:
+            extension = options['output'].rpartition('.')[2].lower()
+            file_format = extension if extension in FORMATS else 'csv'
+
+        self.last_report = time.monotonic()
+        try:
+            written, seconds = export_book(
+                options['table'], options['output'], file_format,
+                chunk_size=options['chunk_size'], progress=self.report,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {written} {options["table"]} in {seconds:.1f}s '
+            f'({self.rate(written, seconds):.0f} rows/sec)'
+        ))
+
+    def report(self, written, seconds):
+        if time.monotonic() - self.last_report < REPORT_INTERVAL:
+            return
+
+        self.last_report = time.monotonic()
+        self.stdout.write(
+            f'{written} exported, {self.rate(written, seconds):.0f} rows/sec'
+        )
+
+    @staticmethod
+    def rate(written, seconds):
+        return written / seconds if seconds else 0.0
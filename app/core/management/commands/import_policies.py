@@ -0,0 +1,92 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pet.importer import import_policies
+
+
+# Column of the rejects file keeping the fields a row has past the header
+EXTRA = 'extra_fields'
+
+
+class Command(BaseCommand):
+    """Django command to load policies and their quates from a CSV file"""
+
+    help = 'Import the policies of a CSV file, see pet.importer for the ' \
+           'columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='CSV file to import')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='rows validated and inserted at a time')
+        parser.add_argument('--rejects',
+                            help='CSV file to write the rejected rows to, '
+                                 'with their errors, instead of listing '
+                                 'them')
+
+    def handle(self, *args, **options):
+        # utf-8-sig drops the byte order mark Excel starts its files with
+        with open(options['input'], newline='',
+                  encoding='utf-8-sig') as input_file:
+            reader = csv.DictReader(input_file)
+            try:
+                fieldnames = reader.fieldnames
+            except UnicodeDecodeError:
+                raise CommandError(f'{options["input"]} is not UTF-8 encoded')
+            if fieldnames is None:
+                raise CommandError(f'{options["input"]} is empty, it needs '
+                                   f'at least a header row')
+            if options['rejects']:
+                with open(options['rejects'], 'w', newline='',
+                          encoding='utf-8') as rejects:
+                    writer = csv.DictWriter(
+                        rejects,
+                        ['row', 'errors'] + fieldnames + [EXTRA],
+                    )
+                    writer.writeheader()
+
+                    def on_reject(number, row, errors):
+                        # DictReader keeps the fields past the header
+                        # under None
+                        row = dict(row)
+                        extra = row.pop(None, None)
+                        writer.writerow({
+                            'row': number, 'errors': self.describe(errors),
+                            EXTRA: ','.join(extra) if extra else '',
+                            **row,
+                        })
+
+                    imported, rejected = self.run(reader, on_reject, options)
+            else:
+                def on_reject(number, row, errors):
+                    self.stdout.write(f'Row {number}: '
+                                      f'{self.describe(errors)}')
+
+                imported, rejected = self.run(reader, on_reject, options)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} policies, rejected {rejected} rows'
+        ))
+
+    def run(self, reader, on_reject, options):
+        try:
+            return import_policies(
+                reader, options['batch_size'], on_reject, self.report
+            )
+        except UnicodeDecodeError:
+            raise CommandError(
+                f'{options["input"]} is not UTF-8 encoded, the batches '
+                f'before the first undecodable row were imported'
+            )
+
+    def report(self, imported, rejected, seconds):
+        rate = (imported + rejected) / seconds if seconds else 0.0
+        self.stdout.write(
+            f'{imported} imported, {rejected} rejected, {rate:.0f} rows/sec'
+        )
+
+    @staticmethod
+    def describe(errors):
+        return '; '.join(
+            f'{column}: {message}' for column, message in errors.items()
+        )
@@ -1,25 +1,74 @@
+import random
 import time
 
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+
+# First wait between probes and the longest one, in seconds
+INITIAL_DELAY = 0.1
+MAX_DELAY = 5.0
 
 
 # BaseCommand is the calss that we want to build on
 class Command(BaseCommand):
     """Django command to pause execution util database is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='database to wait for')
+        parser.add_argument('--timeout', type=float, default=60.0,
+                            help='seconds to wait before giving up')
+        parser.add_argument('--check-migrations', action='store_true',
+                            help='also wait until all migrations are '
+                                 'applied')
+
     # What function run after calling the command
     def handle(self, *args, **options):
         # Print a message to the screen
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                # Print a message to the screen
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+        connection = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        attempt = 0
+        while True:
+            problem = self.probe(connection, options['check_migrations'])
+            if problem is None:
+                break
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(
+                    f'Gave up after {options["timeout"]:g}s: {problem}'
+                )
+            # Exponential backoff with jitter, so containers started
+            # together don't probe in lockstep
+            delay = min(MAX_DELAY, INITIAL_DELAY * 2 ** attempt)
+            delay = min(remaining, random.uniform(delay / 2, delay))
+            self.stdout.write(f'{problem}, waiting {delay:.1f} seconds...')
+            time.sleep(delay)
+            attempt += 1
+
         # Print a message to the screen (Green color)
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def probe(self, connection, check_migrations=False):
+        """Return why the database is not ready, or None if it is"""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            if check_migrations:
+                executor = MigrationExecutor(connection)
+                plan = executor.migration_plan(
+                    executor.loader.graph.leaf_nodes()
+                )
+                if plan:
+                    return f'{len(plan)} migrations not applied'
+        except OperationalError:
+            # Start over with a new connection on the next probe
+            connection.close()
+            return 'Database unavailable'
+
+        return None
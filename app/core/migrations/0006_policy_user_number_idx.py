@@ -0,0 +1,17 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_paid_until'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='policy',
+            index=models.Index(fields=['user', 'policy_number'], name='policy_user_number_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:29
+
+import core.rate_tables
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_policy_user_number_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quate',
+            name='base_rate',
+            field=models.DecimalField(decimal_places=2, default=core.rate_tables.default_base_rate, max_digits=4),
+        ),
+        migrations.AlterField(
+            model_name='quate',
+            name='coinsurance_factor',
+            field=models.PositiveIntegerField(default=core.rate_tables.default_coinsurance),
+        ),
+        migrations.AlterField(
+            model_name='quate',
+            name='deductibale_factor',
+            field=models.PositiveIntegerField(default=core.rate_tables.default_deductible),
+        ),
+    ]
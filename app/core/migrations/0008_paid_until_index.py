@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_quate_rate_table_defaults'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='billingbot',
+            name='paid_until',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='paid_until',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
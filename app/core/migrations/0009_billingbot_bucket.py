@@ -0,0 +1,45 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:35
+import zlib
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+BILLING_BUCKETS = 1024
+BATCH_SIZE = 10000
+
+
+def fill_buckets(apps, schema_editor):
+    BillingBot = apps.get_model('core', 'BillingBot')
+    bot_ids = BillingBot.objects.values_list('bot_id', flat=True)
+
+    buckets = defaultdict(list)
+
+    def flush():
+        for bucket, pks in buckets.items():
+            BillingBot.objects.filter(pk__in=pks).update(bucket=bucket)
+        buckets.clear()
+
+    for count, bot_id in enumerate(bot_ids.iterator(), 1):
+        buckets[zlib.crc32(str(bot_id).encode()) % BILLING_BUCKETS].append(
+            bot_id
+        )
+        if count % BATCH_SIZE == 0:
+            flush()
+    flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_paid_until_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingbot',
+            name='bucket',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_buckets, migrations.RunPython.noop),
+    ]
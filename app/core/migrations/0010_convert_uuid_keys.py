@@ -0,0 +1,112 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:37
+"""Rewrite the text keys of billing bots and quates as UUIDField stores them
+
+Runs before 0011 turns the columns into UUIDFields. Keys are converted a
+batch at a time, each batch in its own transaction, and the policies
+pointing at a converted quate are updated with it. Keys that are not
+UUIDs at all are mapped to a name based UUID, so they stay stable.
+"""
+import uuid
+import zlib
+
+from django.db import migrations, transaction
+from django.db.models import Case, Value, When
+
+
+BATCH_SIZE = 1000
+BILLING_BUCKETS = 1024
+# Namespace of the UUIDs made for keys that were not UUIDs
+LEGACY_KEY_NAMESPACE = uuid.UUID('0c6b3fba-4b4e-4d8e-9d59-3f2a6c3b7c61')
+
+
+def as_uuid(value):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return uuid.uuid5(LEGACY_KEY_NAMESPACE, value)
+
+
+def stored(value, connection):
+    """The text a UUIDField keeps for a UUID on this database"""
+    if connection.features.has_native_uuid_field:
+        return str(value)
+
+    return value.hex
+
+
+def replace(field, changes):
+    """Case expression replacing the old values of a field by new ones"""
+    return Case(
+        *(When(**{field: old}, then=Value(new))
+          for old, new in changes.items()),
+        default=field,
+    )
+
+
+def convert_keys(Model, relations=(), buckets=False):
+    """Return a RunPython function converting the keys of a model"""
+
+    def convert(apps, schema_editor):
+        model = apps.get_model('core', Model)
+        connection = schema_editor.connection
+        alias = connection.alias
+        pk = model._meta.pk.name
+        keys = model.objects.using(alias).order_by(pk).values_list(
+            pk, flat=True
+        )
+
+        last = None
+        while True:
+            batch = keys if last is None else keys.filter(pk__gt=last)
+            batch = list(batch[:BATCH_SIZE])
+            if not batch:
+                break
+            last = batch[-1]
+
+            changes = {}
+            for old in batch:
+                new = stored(as_uuid(old), connection)
+                if new != old:
+                    changes[old] = new
+            if not changes:
+                continue
+
+            with transaction.atomic(using=alias):
+                model.objects.using(alias).filter(pk__in=changes).update(
+                    **{pk: replace(pk, changes)}
+                )
+                for related_model, field in relations:
+                    related = apps.get_model('core', related_model)
+                    related.objects.using(alias).filter(
+                        **{f'{field}__in': changes}
+                    ).update(**{field: replace(field, changes)})
+                if buckets:
+                    for new in changes.values():
+                        model.objects.using(alias).filter(pk=new).update(
+                            bucket=zlib.crc32(
+                                str(uuid.UUID(new)).encode()
+                            ) % BILLING_BUCKETS
+                        )
+
+    return convert
+
+
+class Migration(migrations.Migration):
+
+    # Every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_billingbot_bucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            convert_keys('BillingBot', buckets=True),
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(
+            convert_keys('Quate', [('Policy', 'policy_quate_number')]),
+            migrations.RunPython.noop,
+        ),
+    ]
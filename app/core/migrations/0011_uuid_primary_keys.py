@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:37
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_convert_uuid_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='billingbot',
+            name='bot_id',
+            field=models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='quate',
+            name='quate_id',
+            field=models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:42
+
+import core.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_uuid_primary_keys'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='billingbot',
+            name='bot_id',
+            field=models.UUIDField(default=core.ids.new_id, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='quate',
+            name='quate_id',
+            field=models.UUIDField(default=core.ids.new_id, primary_key=True, serialize=False, unique=True),
+        ),
+    ]
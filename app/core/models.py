@@ -2,21 +2,78 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext as _
 # LISTS
 import core.constants.states as states
 import core.constants.breed_list as breed_list
 import core.constants.age_list as age_list
 import core.constants.policy_limit_factor_list as policy_limit_factor_list
+import core.rate_tables as rate_tables
+import core.ids as ids
 
-import uuid
+import zlib
 
 import datetime
 
 from model_utils import Choices
 
 
-class UserManager(BaseUserManager):
+def as_of(moment=None):
+    """Return the aware datetime a payment check is made at
+
+    Defaults to now. A date means the start of that day in the current
+    time zone.
+    """
+    if moment is None:
+        return timezone.now()
+    if not isinstance(moment, datetime.datetime):
+        moment = datetime.datetime.combine(moment, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+
+    return moment
+
+
+class PaidUntilQuerySet(models.QuerySet):
+    """Filter rows with a paid_until date by whether they are paid"""
+
+    def paid_as_of(self, moment=None):
+        return self.filter(paid_until__gt=as_of(moment))
+
+    def unpaid_as_of(self, moment=None):
+        return self.filter(
+            models.Q(paid_until__isnull=True) |
+            models.Q(paid_until__lte=as_of(moment))
+        )
+
+
+# Billing bots are hashed into a fixed number of buckets, which billing
+# workers split between them (see core.billing.run_shards)
+BILLING_BUCKETS = 1024
+
+
+def billing_bucket(bot_id):
+    """Return the bucket of a bot id, stable across processes and hosts"""
+    return zlib.crc32(str(bot_id).encode()) % BILLING_BUCKETS
+
+
+class BillingBotQuerySet(PaidUntilQuerySet):
+
+    def in_shard(self, shard, shards):
+        """Filter the bots of one of a number of shards"""
+        return self.filter(bucket__in=range(shard, BILLING_BUCKETS, shards))
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Fill in the buckets, which save() would otherwise set"""
+        objs = list(objs)
+        for obj in objs:
+            obj.bucket = billing_bucket(obj.bot_id)
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class UserManager(BaseUserManager.from_queryset(PaidUntilQuerySet)):
 
     def create_user(self, email, password=None, **extra_fields):
         """Creates and save a new user"""
@@ -70,28 +127,32 @@ class User(AbstractBaseUser, PermissionsMixin):
         null=False,
         blank=False
     )
+    # Indexed for rating and reporting by location
     zipcode = models.CharField(
         max_length=5,
         null=False,
         blank=False,
-        default='00000'
+        default='00000',
+        db_index=True
     )
     state = models.CharField(
         blank=True,
         max_length=2,
-        choices=states.STATE_CHOICES
+        choices=states.STATE_CHOICES,
+        db_index=True
     )
     paid_until = models.DateTimeField(
         null=True,
-        blank=True
+        blank=True,
+        db_index=True
     )
 
-    def has_paid_for_current_month(self, current_date=datetime.date.today()):
-        """Check if the use rpaid for the current month"""
+    def has_paid_for_current_month(self, current_date=None):
+        """Check if the user paid for the current month"""
         if self.paid_until is None:
             return False
 
-        return current_date < self.paid_until
+        return as_of(current_date) < self.paid_until
 
     objects = UserManager()
 
@@ -101,11 +162,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 class BillingBot(models.Model):
     """Billing bot for payment"""
 
-    bot_id = models.CharField(
-        max_length=255,
+    bot_id = models.UUIDField(
         primary_key=True,
         unique=True,
-        default=uuid.uuid4,
+        default=ids.new_id,
         blank=False,
         null=False,
     )
@@ -113,20 +173,35 @@ class BillingBot(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     paid_until = models.DateTimeField(
         null=True,
-        blank=True
+        blank=True,
+        db_index=True
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    # Hash of bot_id, see billing_bucket
+    bucket = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        db_index=True
+    )
+
+    objects = BillingBotQuerySet.as_manager()
 
-    def has_paid_for_current_month(self, current_date=datetime.date.today()):
-        """Check if the use rpaid for the current month"""
+    def save(self, *args, **kwargs):
+        self.bucket = billing_bucket(self.bot_id)
+        super().save(*args, **kwargs)
 
-        return current_date < self.paid_until
+    def has_paid_for_current_month(self, current_date=None):
+        """Check if the bot paid for the current month"""
+        if self.paid_until is None:
+            return False
+
+        return as_of(current_date) < self.paid_until
 
     def __str__(self):
-        return self.bot_id
+        return str(self.bot_id)
 
 
 class Policy(models.Model):
@@ -157,6 +232,15 @@ class Policy(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            # Listing and paginating the policies of a user
+            models.Index(
+                fields=['user', 'policy_number'],
+                name='policy_user_number_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.policy_number
 
@@ -173,10 +257,9 @@ class Quate(models.Model):
         ('Male'),
         ('Female')
     )
-    quate_id = models.CharField(
-        max_length=255,
+    quate_id = models.UUIDField(
         primary_key=True,
-        unique=True, default=uuid.uuid4,
+        unique=True, default=ids.new_id,
         blank=False,
         null=False,
     )
@@ -185,7 +268,7 @@ class Quate(models.Model):
         default='MAX'
     )
     base_rate = models.DecimalField(
-        default=54.11,
+        default=rate_tables.default_base_rate,
         max_digits=4,
         decimal_places=2
     )
@@ -215,10 +298,10 @@ class Quate(models.Model):
         choices=policy_limit_factor_list.POLICY_LIMIT_FACTOR_LIST
     )
     deductibale_factor = models.PositiveIntegerField(
-        default=500
+        default=rate_tables.default_deductible
     )
     coinsurance_factor = models.PositiveIntegerField(
-        default=50,
+        default=rate_tables.default_coinsurance,
     )
     exam_fee_factor = models.BooleanField(
         default=False
@@ -254,4 +337,4 @@ class Quate(models.Model):
     )
 
     def __str__(self):
-        return self.quate_id
+        return str(self.quate_id)
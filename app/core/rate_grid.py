@@ -0,0 +1,329 @@
+"""Precomputed premium grid of a rate table version
+
+The grid holds the premium of every state x species x breed group x age
+x limit x deductible x coinsurance combination, with the rest of the
+rating factors applied per quate. Pricing a quate then takes one
+indexed lookup and a few multiplies.
+
+Grids are saved to settings.RATE_GRID_DIR and memory-mapped when loaded,
+so workers share the pages of one file instead of each building its own
+grid at startup. The cells are stored little-endian, like the header.
+
+core.rating prices single quates from the grid of the active version,
+loading it with get_grid the first time one is priced (see
+core.rating.single_pricer).
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+
+from django.conf import settings
+
+import core.constants.factor_tables as factor_tables
+from core.rating import RATING_FIELDS, Rater, get_rater, use_grid
+
+
+# 02 stores the cells little-endian on every platform
+MAGIC = b'RWGRID02'
+# Magic, table version, sha1 of the table, the six axis sizes and the
+# cell count. 88 bytes, which keeps the cells 8 byte aligned.
+HEADER = struct.Struct('<8s32s20s7I')
+
+# Fields rated by the grid, the others are rated per quate
+GRID_FIELDS = frozenset((
+    'base_rate',
+    'geographical_factor',
+    'breed_factor',
+    'age_factor',
+    'policy_limit_factor',
+    'deductibale_factor',
+    'coinsurance_factor',
+))
+
+
+def table_digest(table):
+    """Fingerprint of a rate table, stored to detect stale grid files"""
+    return hashlib.sha1(
+        json.dumps(table, sort_keys=True).encode()
+    ).digest()
+
+
+def grid_path(version):
+    return os.path.join(settings.RATE_GRID_DIR, f'{version}.grid')
+
+
+def _outer_product(axes):
+    """Multiply the relativities of every combination of the axes"""
+    cells = [1.0]
+    for axis in axes:
+        cells = [cell * relativity for cell in cells for relativity in axis]
+
+    return cells
+
+
+def _fill(axes, split=3):
+    """Compute the cells of the axes into an array
+
+    The full product would be millions of float objects, so the leading
+    and trailing axes are multiplied out separately and combined a row
+    at a time.
+    """
+    head = _outer_product(axes[:split])
+    tail = _outer_product(axes[split:])
+    cells = array('d')
+    for value in head:
+        cells.extend([value * relativity for relativity in tail])
+
+    return cells
+
+
+class RateGrid:
+    """Premiums of a rate table version laid out as a flat array"""
+
+    def __init__(self, rater, cells, buffer=None):
+        self.rater = rater
+        self.version = rater.version
+        self.digest = table_digest(rater.table)
+        self.axes = self.build_axes(rater)
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.cells = cells
+        # Keeps the mapped file open for as long as the cells are used
+        self._buffer = buffer
+
+        if len(cells) != self.size:
+            raise ValueError(
+                f'Rate grid {self.version} has {len(cells)} cells, '
+                f'expected {self.size}'
+            )
+
+        strides = []
+        stride = 1
+        for length in reversed(self.shape):
+            strides.insert(0, stride)
+            stride *= length
+        self.strides = tuple(strides)
+
+        groups = len(rater.breed_groups)
+        table = rater.table
+        self.breed_classes = {
+            breed: (factor_tables.BREED_SPECIES[code] * groups +
+                    rater.breed_group_codes[code])
+            for breed, code in factor_tables.BREED_CODES.items()
+        }
+        self.deductible_codes = {
+            deductible: code
+            for code, deductible in enumerate(table['deductibles'])
+        }
+        self.coinsurance_codes = {
+            coinsurance: code
+            for code, coinsurance in enumerate(table['coinsurances'])
+        }
+        self.quate_relativities = tuple(
+            (field, relativity)
+            for field, relativity in zip(RATING_FIELDS[1:],
+                                         rater.relativity_functions)
+            if field not in GRID_FIELDS
+        )
+
+    @staticmethod
+    def build_axes(rater):
+        """Relativities along each axis of the grid, in cell order"""
+        table = rater.table
+        return (
+            tuple(rater.states[state] for state in factor_tables.STATES),
+            tuple(
+                species * group
+                for species in rater.species
+                for group in rater.breed_group_relativities
+            ),
+            tuple(rater.ages[age] for age in factor_tables.AGES),
+            tuple(rater.limits[limit] for limit in factor_tables.LIMITS),
+            tuple(
+                rater.deductible_relativity(deductible)
+                for deductible in table['deductibles']
+            ),
+            tuple(
+                rater.coinsurance_relativity(coinsurance)
+                for coinsurance in table['coinsurances']
+            ),
+        )
+
+    @property
+    def size(self):
+        size = 1
+        for length in self.shape:
+            size *= length
+
+        return size
+
+    @classmethod
+    def build(cls, rater):
+        """Compute every premium of the grid"""
+        axes = cls.build_axes(rater)
+        cells = _fill(((rater.base_rate,),) + axes)
+        return cls(rater, cells)
+
+    def save(self, path):
+        """Write the grid to a file, replacing it atomically"""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        header = HEADER.pack(
+            MAGIC, self.version.encode(), self.digest, *self.shape, self.size
+        )
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as grid_file:
+                grid_file.write(header)
+                grid_file.write(self.little_endian_cells())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def little_endian_cells(self):
+        if sys.byteorder == 'little':
+            return self.cells
+
+        cells = array('d', self.cells)
+        cells.byteswap()
+        return cells
+
+    @classmethod
+    def load(cls, path, rater):
+        """Memory-map a saved grid, checking it matches the rater's table
+
+        Raises ValueError for a file built from another table.
+        """
+        with open(path, 'rb') as grid_file:
+            buffer = mmap.mmap(
+                grid_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+        try:
+            magic, version, digest, *shape, size = HEADER.unpack_from(buffer)
+            if magic != MAGIC:
+                raise ValueError(f'{path} is not a rate grid')
+            if (version.rstrip(b'\0').decode() != rater.version or
+                    digest != table_digest(rater.table)):
+                raise ValueError(f'{path} was built from another rate table')
+            expected = tuple(len(axis) for axis in cls.build_axes(rater))
+            if (tuple(shape) != expected or
+                    len(buffer) != HEADER.size + size * 8):
+                raise ValueError(f'{path} is truncated or has another shape')
+            if sys.byteorder == 'little':
+                cells = memoryview(buffer)[HEADER.size:].cast('d')
+            else:
+                # Big-endian hosts can't map the cells, they get a copy
+                cells = array('d', buffer[HEADER.size:])
+                cells.byteswap()
+        except BaseException:
+            buffer.close()
+            raise
+
+        if sys.byteorder != 'little':
+            buffer.close()
+            buffer = None
+
+        return cls(rater, cells, buffer)
+
+    def cell(self, state, breed, age, limit, deductible, coinsurance):
+        """Return the grid index of a combination, None if off the grid"""
+        strides = self.strides
+        try:
+            return (
+                factor_tables.STATE_CODES[state] * strides[0] +
+                self.breed_classes[breed] * strides[1] +
+                factor_tables.AGE_CODES[age] * strides[2] +
+                factor_tables.LIMIT_CODES[limit] * strides[3] +
+                self.deductible_codes[deductible] * strides[4] +
+                self.coinsurance_codes[coinsurance]
+            )
+        except KeyError:
+            return None
+
+    def price(self, quate, state='', zipcode=''):
+        """Calculate the monthly premium of a quate from the grid
+
+        Quates with factor values the grid doesn't cover, like a
+        deductible that is no longer sold, are rated in full. The grid
+        is laid out by state, quates in a territory take the cells
+        without a state and the territory's relativity.
+        """
+        geographical_factor = float(quate.geographical_factor)
+        territory = None
+        if zipcode and not geographical_factor:
+            territory = self.rater.territories.lookup(zipcode)
+        index = self.cell(
+            '' if geographical_factor or territory else state,
+            quate.breed_factor,
+            quate.age_factor,
+            quate.policy_limit_factor,
+            quate.deductibale_factor,
+            quate.coinsurance_factor,
+        )
+        if index is None:
+            return self.rater.price(quate, state, zipcode)
+
+        premium = self.cells[index]
+        premium *= float(quate.base_rate) / self.rater.base_rate
+        if geographical_factor:
+            premium *= geographical_factor
+        elif territory is not None:
+            premium *= territory.factor
+        for field, relativity in self.quate_relativities:
+            premium *= relativity(getattr(quate, field))
+
+        return round(premium, 2)
+
+
+_grid = None
+_grid_lock = threading.Lock()
+
+
+def get_grid():
+    """Return the grid of the active rate table version
+
+    The grid is loaded once per process, and built and saved first if
+    there is no usable grid file yet.
+    """
+    global _grid
+
+    rater = get_rater()
+    grid = _grid
+    if grid is not None and grid.rater is rater:
+        return grid
+
+    with _grid_lock:
+        # Another thread may have loaded it while this one waited
+        grid = _grid
+        if grid is not None and grid.rater is rater:
+            return grid
+
+        path = grid_path(rater.version)
+        try:
+            grid = RateGrid.load(path, rater)
+        except (OSError, ValueError):
+            grid = RateGrid.build(rater)
+            try:
+                grid.save(path)
+            except OSError:
+                # A read-only deployment still prices from memory
+                pass
+        _grid = grid
+        use_grid(grid)
+
+    return grid
+
+
+def build_grid(version, path=None):
+    """Build the grid of a rate table version and save it"""
+    grid = RateGrid.build(Rater(version))
+    grid.save(path or grid_path(version))
+    return grid
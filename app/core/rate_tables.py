@@ -0,0 +1,120 @@
+"""Versioned rate tables
+
+Every version holds all the parameters core.rating prices quates with.
+A version is never edited once it has been used to price quates: add a
+new one and point settings.RATE_TABLE_VERSION at it.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+
+
+RATE_TABLES = {
+    '2021.1': {
+        'base_rate': '54.11',
+        # Relativity of each state, 1.0 for the ones not listed
+        'states': {
+            'CA': 1.15,
+            'DC': 1.1,
+            'FL': 1.1,
+            'NJ': 1.1,
+            'NY': 1.2,
+            'TX': 1.05,
+        },
+        'genders': {
+            'Male': 1.05,
+            'Female': 1.0,
+        },
+        'species': {
+            'Dog': 1.0,
+            'Cat': 0.75,
+        },
+        # Breeds with higher claim costs, all others are 'standard'
+        'breed_groups': {
+            'brachycephalic': {
+                'relativity': 1.3,
+                'breeds': (
+                    'Boston Terrier',
+                    'Boxer',
+                    'Cavalier King Charles Spaniel',
+                    'English Bulldog',
+                    'French Bulldog',
+                    'Pug',
+                    'Shih Tzu',
+                    'Exotic Shorthair',
+                    'Himalayan',
+                    'Persian',
+                ),
+            },
+            'giant': {
+                'relativity': 1.2,
+                'breeds': (
+                    'Bernese Mountain Dog',
+                    'Great Dane',
+                    'Irish Wolfhound',
+                    'Mastiff',
+                    'Newfoundland',
+                    'Saint Bernard',
+                ),
+            },
+        },
+        'age_step': 0.05,
+        'limit_base': 0.8,
+        'limit_step': 0.02,
+        'unlimited': 1.35,
+        'base_deductible': 500,
+        'min_deductible': 50,
+        'deductible_exponent': 0.2,
+        'base_coinsurance': 50,
+        # Deductibles and coinsurances sold, the premium grid covers these
+        'deductibles': (100, 250, 500, 750, 1000),
+        'coinsurances': (50, 60, 70, 80, 90, 100),
+        # Optional coverage loads
+        'exam_fee': 1.10,
+        'holistic': 1.05,
+        'boarding': 1.03,
+        'breeding': 1.15,
+        # Discounts
+        'digital_partner': 0.95,
+        'affinity_group': 0.95,
+        'smart_collar': 0.95,
+    },
+}
+
+# 2021.2 rates the metropolitan areas below by ZIP code, see
+# core.territories. Everywhere else is still rated by state.
+RATE_TABLES['2021.2'] = {
+    **RATE_TABLES['2021.1'],
+    # Code, relativity and ranges of 5 digit ZIP codes of each territory
+    'territories': (
+        ('NY-NYC', 1.35, (('10001', '10299'), ('11201', '11256'),
+                          ('11351', '11499'))),
+        ('NY-LI', 1.2, (('11501', '11999'),)),
+        ('NJ-NORTH', 1.2, (('07001', '07399'),)),
+        ('MA-BOS', 1.15, (('02101', '02299'),)),
+        ('DC-METRO', 1.15, (('20001', '20099'),)),
+        ('FL-MIA', 1.2, (('33101', '33199'),)),
+        ('IL-CHI', 1.15, (('60601', '60699'),)),
+        ('TX-HOU', 1.05, (('77001', '77099'),)),
+        ('CA-LA', 1.3, (('90001', '90099'), ('90201', '90899'))),
+        ('CA-SF', 1.3, (('94101', '94199'),)),
+        ('WA-SEA', 1.1, (('98101', '98199'),)),
+    ),
+}
+
+
+def get_rate_table(version=None):
+    """Return a version of the rate tables, by default the active one"""
+    return RATE_TABLES[version or settings.RATE_TABLE_VERSION]
+
+
+def default_base_rate():
+    return Decimal(get_rate_table()['base_rate'])
+
+
+def default_deductible():
+    return get_rate_table()['base_deductible']
+
+
+def default_coinsurance():
+    return get_rate_table()['base_coinsurance']
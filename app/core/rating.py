@@ -0,0 +1,428 @@
+import threading
+from collections import OrderedDict
+from operator import attrgetter, mul
+
+from django.conf import settings
+from django.dispatch import Signal
+
+import core.constants.factor_tables as factor_tables
+from core.rate_tables import get_rate_table
+from core.territories import TerritoryIndex
+
+
+# Sent when the rating tables change, so cached premiums are dropped
+rate_tables_changed = Signal()
+
+
+# The quate fields that take part in the premium calculation, in the
+# order the batch engine expects its rows
+RATING_FIELDS = (
+    'base_rate',
+    'geographical_factor',
+    'gender_factor',
+    'breed_factor',
+    'age_factor',
+    'policy_limit_factor',
+    'deductibale_factor',
+    'coinsurance_factor',
+    'exam_fee_factor',
+    'holistic_alternative_treatment_factor',
+    'boarding_advertising_holoday_cancellation_rate',
+    'breeding_endorsement',
+    'digital_partner_factor',
+    'affinity_group_factor',
+    'smart_collar_factor',
+    'employee_benefit_factor',
+)
+
+
+def _flag(relativity):
+    """Return a relativity function for a boolean coverage option"""
+    return lambda enabled: relativity if enabled else 1.0
+
+
+def geographical_relativity(value):
+    """A geographical factor of zero means it was not rated yet"""
+    value = float(value)
+    return value if value else 1.0
+
+
+def employee_benefit_relativity(value):
+    """The employee benefit is a discount given as a fraction"""
+    return 1.0 - min(max(float(value), 0.0), 1.0)
+
+
+def _relativity_column(column, relativity):
+    """Map a column to its relativities, rating each distinct value once"""
+    factors = {value: relativity(value) for value in set(column)}
+    return map(factors.__getitem__, column)
+
+
+class Rater:
+    """Prices quates with one version of the rate tables
+
+    The relativity of every choice value is compiled into a dict when
+    the rater is built, so rating a factor is a single lookup.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.table = table = get_rate_table(version)
+        self.base_rate = float(table['base_rate'])
+
+        self.states = {
+            state: table['states'].get(state, 1.0)
+            for state in factor_tables.STATES
+        }
+        self.territories = TerritoryIndex(table.get('territories', ()))
+        self.genders = dict(table['genders'])
+        self.species = tuple(
+            table['species'][species] for species in factor_tables.SPECIES
+        )
+
+        # Breeds are rated by species and breed group, group 0 being
+        # every breed not listed in the table
+        self.breed_groups = ('standard',) + tuple(table['breed_groups'])
+        self.breed_group_relativities = (1.0,) + tuple(
+            group['relativity'] for group in table['breed_groups'].values()
+        )
+        group_codes = {
+            breed: code
+            for code, group in enumerate(table['breed_groups'].values(), 1)
+            for breed in group['breeds']
+        }
+        self.breed_group_codes = tuple(
+            group_codes.get(name, 0) for name in factor_tables.BREED_NAMES
+        )
+        self.breeds = {
+            breed: (
+                self.species[factor_tables.BREED_SPECIES[code]] *
+                self.breed_group_relativities[self.breed_group_codes[code]]
+            )
+            for breed, code in factor_tables.BREED_CODES.items()
+        }
+
+        self.ages = {
+            age: 1.0 + table['age_step'] * factor_tables.AGE_YEARS[code]
+            for age, code in factor_tables.AGE_CODES.items()
+        }
+        self.limits = {
+            limit: self._limit_relativity(factor_tables.LIMIT_AMOUNTS[code])
+            for limit, code in factor_tables.LIMIT_CODES.items()
+        }
+
+        # One relativity function per rating field after the base rate
+        self.relativity_functions = (
+            geographical_relativity,
+            self.gender_relativity,
+            self.breed_relativity,
+            self.age_relativity,
+            self.limit_relativity,
+            self.deductible_relativity,
+            self.coinsurance_relativity,
+            _flag(table['exam_fee']),
+            _flag(table['holistic']),
+            _flag(table['boarding']),
+            self.breeding_relativity,
+            _flag(table['digital_partner']),
+            _flag(table['affinity_group']),
+            _flag(table['smart_collar']),
+            employee_benefit_relativity,
+        )
+
+    def _limit_relativity(self, amount):
+        if amount is None:
+            return self.table['unlimited']
+
+        return (self.table['limit_base'] +
+                self.table['limit_step'] * (amount / 1000))
+
+    def state_relativity(self, state):
+        return self.states.get(state, 1.0)
+
+    def location_relativity(self, state, zipcode=''):
+        """Rate the territory of the ZIP code, or else the state"""
+        if zipcode:
+            territory = self.territories.lookup(zipcode)
+            if territory is not None:
+                return territory.factor
+
+        return self.state_relativity(state)
+
+    def _located_relativity(self, location):
+        """Relativity of a (state, zipcode) pair, None when not rated"""
+        if location is None:
+            return 1.0
+
+        return self.location_relativity(*location)
+
+    def gender_relativity(self, gender):
+        return self.genders.get(gender, 1.0)
+
+    def breed_relativity(self, breed):
+        return self.breeds.get(breed, 1.0)
+
+    def age_relativity(self, age):
+        return self.ages.get(age, 1.0)
+
+    def limit_relativity(self, limit):
+        return self.limits.get(limit, 1.0)
+
+    def deductible_relativity(self, deductible):
+        deductible = max(deductible, self.table['min_deductible'])
+        return ((self.table['base_deductible'] / deductible) **
+                self.table['deductible_exponent'])
+
+    def coinsurance_relativity(self, coinsurance):
+        return 1.0 + (coinsurance - self.table['base_coinsurance']) / 100
+
+    def breeding_relativity(self, endorsement):
+        if endorsement in ('Male', 'Female'):
+            return self.table['breeding']
+
+        return 1.0
+
+    def price(self, quate, state='', zipcode=''):
+        """Calculate the monthly premium of a single quate
+
+        The location of the policy holder, their territory or else their
+        state, is only rated when the quate has no geographical factor
+        of its own.
+        """
+        premium = float(quate.base_rate)
+        for field, relativity in zip(RATING_FIELDS[1:],
+                                     self.relativity_functions):
+            premium *= relativity(getattr(quate, field))
+        if (state or zipcode) and not quate.geographical_factor:
+            premium *= self.location_relativity(state, zipcode)
+
+        return round(premium, 2)
+
+    def price_rows(self, rows, locations=None):
+        """Calculate the premiums of many quates in one batch
+
+        Takes rows of rating values ordered like RATING_FIELDS (for
+        example from `values_list(*RATING_FIELDS)`) and works column by
+        column, so every distinct factor value is rated once per batch
+        instead of once per quate. `locations` holds the (state,
+        zipcode) of the policy holder of every row, rated like price()
+        does.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        if locations is not None:
+            # The geographical factor of a quate overrides its location
+            located = [
+                None if row[1] else (state or '', zipcode or '')
+                for row, (state, zipcode) in zip(rows, locations)
+            ]
+
+        columns = zip(*rows)
+        premiums = map(float, next(columns))
+        for column, relativity in zip(columns, self.relativity_functions):
+            premiums = map(
+                mul, premiums, _relativity_column(column, relativity)
+            )
+        if locations is not None:
+            premiums = map(mul, premiums, _relativity_column(
+                located, self._located_relativity
+            ))
+
+        return [round(premium, 2) for premium in premiums]
+
+
+_rater = None
+_rater_lock = threading.Lock()
+
+
+def get_rater():
+    """Return the rater of settings.RATE_TABLE_VERSION
+
+    The rater is rebuilt when the setting changes, which also drops the
+    premiums cached with the previous version.
+    """
+    global _rater
+
+    rater = _rater
+    if rater is not None and rater.version == settings.RATE_TABLE_VERSION:
+        return rater
+
+    with _rater_lock:
+        previous = _rater
+        rater = _rater = Rater(settings.RATE_TABLE_VERSION)
+    if previous is not None:
+        rate_tables_changed.send(sender=Rater, version=rater.version)
+
+    return rater
+
+
+# Premium grid of the process, see core.rate_grid.get_grid
+_grid = None
+
+
+def use_grid(grid):
+    """Price single quates from a premium grid while its rater is active"""
+    global _grid
+
+    _grid = grid
+
+
+def single_pricer(rater):
+    """Return the premium grid of the rater, loading it on first use
+
+    Both price a quate the same, to the cent barring float rounding,
+    and the grid does it with one lookup in place of most relativities.
+    Falls back to the rater if the active version changed meanwhile.
+    """
+    grid = _grid
+    if grid is not None and grid.rater is rater:
+        return grid
+
+    from core.rate_grid import get_grid
+
+    grid = get_grid()
+    if grid.rater is not rater:
+        return rater
+    use_grid(grid)
+
+    return grid
+
+
+def price_quate(quate, state='', zipcode=''):
+    """Calculate the monthly premium of a single quate"""
+    return single_pricer(get_rater()).price(quate, state, zipcode)
+
+
+_rating_values = attrgetter(*RATING_FIELDS)
+# Decimal fields, which unsaved quates hold as floats
+_DECIMAL_POSITIONS = tuple(
+    RATING_FIELDS.index(field)
+    for field in ('base_rate', 'geographical_factor',
+                  'employee_benefit_factor')
+)
+
+
+def rating_key(quate, state='', zipcode=''):
+    """Canonical key of the rating factors of a quate
+
+    Quates differing only in fields that don't affect the premium, like
+    quate_id or pet_name, share a key. Decimal values are turned into
+    floats so saved and unsaved quates agree. The location of the policy
+    holder is part of the key unless the quate's geographical factor
+    overrides it.
+    """
+    values = list(_rating_values(quate))
+    for position in _DECIMAL_POSITIONS:
+        values[position] = float(values[position])
+    if values[1]:
+        location = ('', '')
+    else:
+        location = (state or '', (zipcode or '')[:5])
+
+    return tuple(values) + location
+
+
+class PricingCache:
+    """LRU cache of premiums keyed by rate table version and rating_key
+
+    Hits are counted without the lock, so under threads the counters are
+    close but not exact.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._premiums = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by clear(), so premiums rated before are not kept
+        self._generation = 0
+
+    def price(self, quate, state='', zipcode=''):
+        """Return the premium of a quate, rating it only on a miss"""
+        rater = get_rater()
+        key = (rater.version,) + rating_key(quate, state, zipcode)
+        try:
+            premium = self._premiums[key]
+            self._premiums.move_to_end(key)
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return premium
+
+        generation = self._generation
+        premium = single_pricer(rater).price(quate, state, zipcode)
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._premiums[key] = premium
+                if len(self._premiums) > self.max_size:
+                    self._premiums.popitem(last=False)
+
+        return premium
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._premiums.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._premiums),
+            'max_size': self.max_size,
+        }
+
+
+pricing_cache = PricingCache(settings.PRICING_CACHE_SIZE)
+
+
+def clear_pricing_cache(**kwargs):
+    pricing_cache.clear()
+
+
+rate_tables_changed.connect(clear_pricing_cache)
+
+
+def price_quate_cached(quate, state='', zipcode=''):
+    """Calculate the premium of a quate, reusing earlier results"""
+    return pricing_cache.price(quate, state, zipcode)
+
+
+def price_rows(rows, locations=None):
+    """Calculate the premiums of many quates in one batch"""
+    return get_rater().price_rows(rows, locations)
+
+
+def price_quates(quates, locations=None):
+    """Calculate the premiums of a batch of quate instances"""
+    return price_rows(
+        (
+            [getattr(quate, field) for field in RATING_FIELDS]
+            for quate in quates
+        ),
+        locations
+    )
+
+
+def price_queryset(queryset):
+    """Calculate the premiums of a quate queryset without loading models
+
+    Quates bound to a policy are rated at the state and ZIP code of the
+    policy holder. Returns a dict of quate_id to premium.
+    """
+    rows = list(queryset.values_list(
+        'quate_id', 'policy__user__state', 'policy__user__zipcode',
+        *RATING_FIELDS
+    ))
+    if not rows:
+        return {}
+
+    quate_ids = [row[0] for row in rows]
+    return dict(zip(quate_ids, price_rows(
+        (row[3:] for row in rows),
+        [row[1:3] for row in rows],
+    )))
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core import instrumentation
+from core.authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a token once it is deleted"""
+    invalidate_tokens(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached copies of a user when it changes, e.g. is deactivated"""
+    if created:
+        return
+
+    invalidate_tokens(
+        *Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    """Time the queries of the sampled requests"""
+    instrumentation.install(connection)
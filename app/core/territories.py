@@ -0,0 +1,69 @@
+"""ZIP code to rating territory lookup
+
+A version of the rate tables may split the country into territories,
+each a few ranges of 5 digit ZIP codes with its own geographical
+relativity. The ranges are compiled into sorted lists of their first
+and last ZIP code, so finding the territory of a ZIP code is a bisect
+over a few hundred bytes. The codes are kept as text, which sorts like
+the numbers as every code has 5 digits and saves parsing the ZIP code
+of every lookup. core.rating builds the index along with the rest of a
+rater, so it is loaded once per process.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+
+Territory = namedtuple('Territory', ('code', 'factor'))
+
+
+class TerritoryIndex:
+    """Territories of the ZIP code ranges of one rate table version"""
+
+    def __init__(self, territories):
+        ranges = sorted(
+            (first, last, Territory(code, float(factor)))
+            for code, factor, zip_ranges in territories
+            for first, last in zip_ranges
+        )
+        for first, last, territory in ranges:
+            if not (self.valid(first) and self.valid(last) and
+                    first <= last):
+                raise ValueError(
+                    f'{first} to {last} of {territory.code} is not a '
+                    f'range of 5 digit ZIP codes'
+                )
+        for (_, last, previous), (first, _, territory) in zip(ranges,
+                                                              ranges[1:]):
+            if first <= last:
+                raise ValueError(
+                    f'ZIP codes {first} to {last} are in both '
+                    f'{previous.code} and {territory.code}'
+                )
+
+        self.firsts = [first for first, _, _ in ranges]
+        self.lasts = [last for _, last, _ in ranges]
+        self.territories = [territory for _, _, territory in ranges]
+
+    def __len__(self):
+        return len(self.territories)
+
+    @staticmethod
+    def valid(zipcode):
+        return len(zipcode) == 5 and zipcode.isdigit()
+
+    def lookup(self, zipcode):
+        """Return the Territory of a ZIP code, or None outside of them
+
+        Takes the 5 digit ZIP code as text, ZIP+4 codes are cut down.
+        """
+        if not zipcode:
+            return None
+        zipcode = zipcode[:5]
+        if len(zipcode) != 5 or not zipcode.isdigit():
+            return None
+
+        position = bisect_right(self.firsts, zipcode) - 1
+        if position >= 0 and zipcode <= self.lasts[position]:
+            return self.territories[position]
+
+        return None
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import CachedTokenAuthentication, token_cache
+
+
+class CachedTokenAuthenticationTest(TestCase):
+
+    def setUp(self):
+        token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            'test@rainwalk.io',
+            'password12345'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_lookup_is_cached(self):
+        """Test a token is only looked up in the database once"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_invalid_token(self):
+        """Test an unknown token fails to authenticate"""
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials('invalid')
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token stops authenticating"""
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
+
+    def test_deactivated_user_invalidated(self):
+        """Test the token of a deactivated user stops authenticating"""
+        self.auth.authenticate_credentials(self.token.key)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
@@ -0,0 +1,161 @@
+import datetime
+import os
+import tempfile
+import uuid
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from core import billing
+from core.models import BillingBot, billing_bucket
+
+
+def aware(*args):
+    return timezone.make_aware(datetime.datetime(*args))
+
+
+class BillingRunTest(TestCase):
+
+    def setUp(self):
+        self.moment = aware(2021, 3, 15)
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint = billing.Checkpoint(
+            os.path.join(self.directory.name, 'checkpoint')
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def sample_bot(self, number, paid_until=None):
+        user = get_user_model().objects.create_user(
+            f'test{number}@rainwalk.io', 'password12345'
+        )
+        return BillingBot.objects.create(
+            bot_id=uuid.UUID(int=number), user=user, paid_until=paid_until
+        )
+
+    def test_add_months(self):
+        """Test months are added with the day clamped to the month"""
+        self.assertEqual(billing.add_months(aware(2021, 1, 31)),
+                         aware(2021, 2, 28))
+        self.assertEqual(billing.add_months(aware(2021, 12, 15)),
+                         aware(2022, 1, 15))
+
+    def test_due_bots_renewed(self):
+        """Test unpaid bots and their users are renewed for a month"""
+        never = self.sample_bot(1)
+        lapsed = self.sample_bot(2, aware(2021, 3, 1))
+        paid = self.sample_bot(3, aware(2021, 4, 1))
+
+        renewed, _ = billing.billing_run(self.moment, batch_size=1)
+
+        self.assertEqual(renewed, 2)
+        for bot in (never, lapsed):
+            bot.refresh_from_db()
+            bot.user.refresh_from_db()
+            self.assertEqual(bot.paid_until, aware(2021, 4, 15))
+            self.assertEqual(bot.user.paid_until, aware(2021, 4, 15))
+        paid.refresh_from_db()
+        self.assertEqual(paid.paid_until, aware(2021, 4, 1))
+
+    def test_resume_from_checkpoint(self):
+        """Test a crashed run resumes after the last committed batch"""
+        bots = [self.sample_bot(number) for number in range(5)]
+        renew_batch = billing.renew_batch
+        calls = []
+
+        def crash_on_second_batch(batch, moment):
+            calls.append(len(batch))
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            renew_batch(batch, moment)
+
+        with patch('core.billing.renew_batch', crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                billing.billing_run(
+                    self.moment, self.checkpoint, batch_size=2
+                )
+
+        self.assertEqual(self.checkpoint.load(),
+                         (self.moment, str(bots[1].pk)))
+
+        renewed, _ = billing.billing_run(
+            aware(2022, 1, 1), self.checkpoint, batch_size=2
+        )
+
+        self.assertEqual(renewed, 3)
+        self.assertIsNone(self.checkpoint.load())
+        self.assertFalse(BillingBot.objects.unpaid_as_of(self.moment))
+
+    def test_billing_run_command(self):
+        """Test the command renews due bots and reports its rate"""
+        self.sample_bot(1)
+
+        out = StringIO()
+
+        call_command(
+            'billing_run', '--as-of', '2021-03-15',
+            '--checkpoint', self.checkpoint.path, stdout=out,
+        )
+
+        self.assertIn('Renewed 1 billing bots', out.getvalue())
+        self.assertIn('rows/sec', out.getvalue())
+        self.assertFalse(BillingBot.objects.unpaid_as_of(self.moment))
+
+    def test_shards_partition_bots(self):
+        """Test every bot falls in exactly one shard"""
+        bots = {self.sample_bot(number).pk for number in range(20)}
+
+        shards = [
+            set(BillingBot.objects.in_shard(shard, 3)
+                .values_list('pk', flat=True))
+            for shard in range(3)
+        ]
+
+        self.assertEqual(set.union(*shards), bots)
+        self.assertEqual(sum(map(len, shards)), len(bots))
+
+    def test_bulk_created_bots_get_buckets(self):
+        """Test bulk created bots are bucketed like saved ones"""
+        user = get_user_model().objects.create_user(
+            'test@rainwalk.io', 'password12345'
+        )
+        saved = BillingBot.objects.create(user=user)
+        created = BillingBot.objects.bulk_create([BillingBot(user=user)])
+
+        for bot in (saved, created[0]):
+            bot.refresh_from_db()
+            self.assertEqual(bot.bucket, billing_bucket(bot.bot_id))
+
+    def test_sharded_run(self):
+        """Test a sharded run renews every due bot once"""
+        for number in range(10):
+            self.sample_bot(number)
+
+        renewed, _ = billing.run_shards(1, shards=4, moment=self.moment,
+                                        batch_size=3)
+
+        self.assertEqual(renewed, 10)
+        self.assertFalse(BillingBot.objects.unpaid_as_of(self.moment))
+
+    def test_sharded_run_command(self):
+        """Test running a single shard from the command"""
+        bots = [self.sample_bot(number) for number in range(10)]
+        in_shard = BillingBot.objects.in_shard(1, 2).count()
+        out = StringIO()
+
+        call_command(
+            'billing_run', '--as-of', '2021-03-15', '--shards', '2',
+            '--shard', '1', '--checkpoint', self.checkpoint.path,
+            stdout=out,
+        )
+
+        self.assertIn(f'Renewed {in_shard} billing bots', out.getvalue())
+        self.assertEqual(
+            BillingBot.objects.unpaid_as_of(self.moment).count(),
+            len(bots) - in_shard
+        )
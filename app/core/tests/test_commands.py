@@ -1,25 +1,63 @@
 from unittest.mock import patch
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
 
+CURSOR = 'django.db.backends.base.base.BaseDatabaseWrapper.cursor'
+
+
 class CommandsTestCase(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
+        with patch(CURSOR) as cursor:
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 1)
+            self.assertEqual(cursor.call_count, 1)
+            execute = cursor.return_value.__enter__.return_value.execute
+            execute.assert_called_once_with('SELECT 1')
 
     @patch('time.sleep', return_value=None)
     def test_wait_for_db(self, ts):
         """Test waiting for db"""
 
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
+        with patch(CURSOR) as cursor:
+            cursor.side_effect = [OperationalError] * 5 + [cursor.return_value]
             call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+            self.assertEqual(cursor.call_count, 6)
+
+        delays = [call.args[0] for call in ts.call_args_list]
+        self.assertEqual(len(delays), 5)
+        self.assertLessEqual(delays[0], 0.1)
+        self.assertGreater(delays[-1], 0.4)
+
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_db_timeout(self, ts):
+        """Test giving up once the timeout is spent"""
+
+        with patch(CURSOR, side_effect=OperationalError), \
+                patch('time.monotonic', side_effect=[0, 1, 2, 3, 11]):
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', '--timeout', '10')
+
+        self.assertEqual(ts.call_count, 3)
+
+    @patch('time.sleep', return_value=None)
+    def test_wait_for_migrations(self, ts):
+        """Test waiting until the migrations are applied"""
+        executor = 'core.management.commands.wait_for_db.MigrationExecutor'
+
+        with patch(executor) as migration_executor:
+            migration_executor.return_value.migration_plan.side_effect = [
+                ['0001_initial'], [],
+            ]
+            call_command('wait_for_db', '--check-migrations')
+
+        self.assertEqual(ts.call_count, 1)
+
+    def test_migrations_applied(self):
+        """Test the test database counts as migrated"""
+        call_command('wait_for_db', '--check-migrations', '--timeout', '0')
@@ -0,0 +1,71 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+from django.test import SimpleTestCase
+
+from core.backends.postgresql.base import (BlockingConnectionPool,
+                                           DatabaseWrapper)
+
+
+def fake_connect(self, key=None):
+    """Stand in for opening a connection to the server"""
+    connection = MagicMock(closed=False)
+    connection.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+    if key is not None:
+        self._used[key] = connection
+        self._rused[id(connection)] = key
+    else:
+        self._pool.append(connection)
+
+    return connection
+
+
+@patch.object(BlockingConnectionPool, '_connect', fake_connect)
+class BlockingConnectionPoolTest(SimpleTestCase):
+    """Test the pool shared by the threads of a worker"""
+
+    def test_waits_for_returned_connection(self):
+        """Test an exhausted pool hands out the next connection returned"""
+        connection_pool = BlockingConnectionPool(0, 1, 5)
+        first = connection_pool.getconn()
+        threading.Timer(0.05, connection_pool.putconn, (first,)).start()
+
+        self.assertIs(connection_pool.getconn(), first)
+
+    def test_keeps_returned_connections(self):
+        """Test returned connections stay open past the minimum"""
+        connection_pool = BlockingConnectionPool(0, 2, 5)
+        connections = [connection_pool.getconn() for _ in range(2)]
+        for connection in connections:
+            connection_pool.putconn(connection)
+
+        for connection in connections:
+            connection.close.assert_not_called()
+
+    def test_timeout(self):
+        """Test waiting for a connection gives up after the timeout"""
+        connection_pool = BlockingConnectionPool(0, 1, 0.01)
+        connection_pool.getconn()
+
+        with self.assertRaises(pool.PoolError):
+            connection_pool.getconn()
+
+    def test_borrow_replaces_broken_connection(self):
+        """Test a broken pooled connection is closed and replaced"""
+        connection_pool = BlockingConnectionPool(0, 2, 5)
+        broken = connection_pool.getconn()
+        broken.cursor.side_effect = psycopg2.OperationalError
+        connection_pool.putconn(broken)
+        wrapper = DatabaseWrapper({
+            'CONN_HEALTH_CHECKS': True,
+            'POOL_OPTIONS': {'MAX_CONNS': 2},
+            'OPTIONS': {},
+        })
+
+        connection = wrapper.borrow(connection_pool)
+
+        self.assertIsNot(connection, broken)
+        broken.close.assert_called_once()
@@ -0,0 +1,129 @@
+import csv
+import decimal
+import os
+import sys
+import tempfile
+import unittest
+import uuid
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.export import export_book, lookup_field
+from core.models import Policy, Quate
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ExportBookTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'book.csv')
+        self.user = get_user_model().objects.create_user(
+            'test@rainwalk.io', 'password12345', state='NY'
+        )
+        self.quate = Quate.objects.create(quate_id=uuid.UUID(int=1))
+        self.unbound = Quate.objects.create(quate_id=uuid.UUID(int=2))
+        self.policy = Policy.objects.create(
+            policy_number='P-1',
+            policy_quate_number=self.quate,
+            user=self.user,
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.path, newline='') as book:
+            return list(csv.DictReader(book))
+
+    def test_export_policies(self):
+        """Test policies are exported with their quate and user state"""
+        written, _ = export_book('policies', self.path)
+
+        self.assertEqual(written, 1)
+        [row] = self.read()
+        self.assertEqual(row['policy_number'], 'P-1')
+        self.assertEqual(row['state'], 'NY')
+        self.assertEqual(row['quate_id'], str(self.quate.quate_id))
+        self.assertEqual(row['base_rate'], str(self.quate.base_rate))
+
+    def test_export_quates(self):
+        """Test quates without a policy are exported without a state"""
+        written, _ = export_book('quates', self.path, chunk_size=1)
+
+        self.assertEqual(written, 2)
+        rows = {row['quate_id']: row for row in self.read()}
+        self.assertEqual(rows[str(self.quate.quate_id)]['state'], 'NY')
+        self.assertEqual(rows[str(self.unbound.quate_id)]['state'], '')
+
+    def test_progress(self):
+        """Test progress is reported after every chunk"""
+        Quate.objects.create(quate_id=uuid.UUID(int=3))
+        reports = []
+
+        export_book('quates', self.path, chunk_size=2,
+                    progress=lambda written, seconds: reports.append(written))
+
+        self.assertEqual(reports, [2, 3])
+
+    def test_lookup_field(self):
+        """Test the field behind a lookup across relations is found"""
+        self.assertEqual(lookup_field(Policy, 'user__state'),
+                         get_user_model()._meta.get_field('state'))
+        self.assertEqual(lookup_field(Policy, 'user_id'),
+                         get_user_model()._meta.get_field('id'))
+
+    def test_command(self):
+        """Test the command reports the rows exported"""
+        out = StringIO()
+
+        call_command('export_book', 'quates', self.path, stdout=out)
+
+        self.assertIn('Exported 2 quates', out.getvalue())
+        self.assertEqual(len(self.read()), 2)
+
+    def test_command_unknown_table(self):
+        """Test only the known tables can be exported"""
+        with self.assertRaises(CommandError):
+            call_command('export_book', 'users', self.path)
+
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_export_parquet(self):
+        """Test policies read back from parquet with their types"""
+        path = os.path.join(self.directory.name, 'book.parquet')
+
+        written, _ = export_book('policies', path, 'parquet', chunk_size=1)
+
+        self.assertEqual(written, 1)
+        table = pyarrow.parquet.read_table(path)
+        [row] = table.to_pylist()
+        self.assertEqual(row['policy_number'], 'P-1')
+        self.assertEqual(row['state'], 'NY')
+        self.assertEqual(row['user_id'], self.user.pk)
+        self.assertEqual(row['quate_id'], str(self.quate.quate_id))
+        self.assertEqual(row['base_rate'],
+                         decimal.Decimal(str(self.quate.base_rate)))
+        field = Quate._meta.get_field('base_rate')
+        self.assertEqual(
+            table.schema.field('base_rate').type,
+            pyarrow.decimal128(field.max_digits, field.decimal_places)
+        )
+
+    def test_parquet_needs_pyarrow(self):
+        """Test exporting to parquet without pyarrow fails clearly"""
+        path = os.path.join(self.directory.name, 'book.parquet')
+
+        with patch.dict(sys.modules, {'pyarrow': None}):
+            with self.assertRaises(CommandError):
+                call_command('export_book', 'quates', path)
+
+        self.assertFalse(os.path.exists(path))
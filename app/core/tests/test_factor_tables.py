@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+from core.constants import factor_tables
+from core.constants.breed_list import BREED_LIST
+
+
+class FactorTablesTest(TestCase):
+
+    def test_breed_codes(self):
+        """Test every breed choice gets a code with its clean name"""
+        for species, breeds in BREED_LIST:
+            for breed, _ in breeds:
+                code = factor_tables.BREED_CODES[breed]
+
+                self.assertEqual(factor_tables.BREED_NAMES[code],
+                                 breed.strip())
+                self.assertEqual(
+                    factor_tables.SPECIES[factor_tables.BREED_SPECIES[code]],
+                    species
+                )
+
+    def test_age_years(self):
+        """Test age choices are parsed into years"""
+        years = dict(zip(factor_tables.AGES, factor_tables.AGE_YEARS))
+
+        self.assertEqual(years['0-1 year'], 0)
+        self.assertEqual(years['1 year'], 1)
+        self.assertEqual(years['12 years'], 12)
+        self.assertEqual(years['20 years or more'], 20)
+
+    def test_limit_amounts(self):
+        """Test policy limit choices are parsed into dollar amounts"""
+        amounts = dict(zip(factor_tables.LIMITS, factor_tables.LIMIT_AMOUNTS))
+
+        self.assertEqual(amounts['$1,000'], 1000)
+        self.assertEqual(amounts['$20,000'], 20000)
+        self.assertIsNone(amounts['Unlimited'])
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.test import TestCase, override_settings
+
+
+ARGON2_FIRST = [
+    'core.hashers.TunedArgon2PasswordHasher',
+    'core.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+class TunedHashersTest(TestCase):
+
+    def login(self, email, password):
+        """Authenticate and return the refreshed user"""
+        self.assertIsNotNone(authenticate(username=email, password=password))
+        return get_user_model().objects.get(email=email)
+
+    @override_settings(PBKDF2_ITERATIONS=1000)
+    def test_pbkdf2_iterations_from_settings(self):
+        """Test PBKDF2 hashes use the configured iterations"""
+        user = get_user_model().objects.create_user(
+            'test@rainwalk.io',
+            'password12345'
+        )
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_when_iterations_change(self):
+        """Test a password is rehashed on login when the cost changes"""
+        with self.settings(PBKDF2_ITERATIONS=1000):
+            get_user_model().objects.create_user(
+                'test@rainwalk.io',
+                'password12345'
+            )
+
+        with self.settings(PBKDF2_ITERATIONS=2000):
+            user = self.login('test@rainwalk.io', 'password12345')
+
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASHERS=ARGON2_FIRST)
+    def test_rehash_to_argon2(self):
+        """Test switching to argon2 rehashes old passwords on login"""
+        with self.settings(PASSWORD_HASHERS=settings.PASSWORD_HASHERS[::-1]):
+            get_user_model().objects.create_user(
+                'test@rainwalk.io',
+                'password12345'
+            )
+
+        with self.settings(ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=256):
+            user = self.login('test@rainwalk.io', 'password12345')
+
+        self.assertTrue(user.password.startswith('argon2$argon2i$'))
+        self.assertIn('m=256,t=1', user.password)
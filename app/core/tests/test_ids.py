@@ -0,0 +1,32 @@
+import uuid
+
+from django.test import TestCase
+
+from core import ids
+from core.models import Quate
+
+
+class IdsTest(TestCase):
+
+    def test_uuid7_version_and_variant(self):
+        """Test time-ordered ids are valid version 7 UUIDs"""
+        key = ids.uuid7()
+
+        self.assertEqual(key.version, 7)
+        self.assertEqual(key.variant, uuid.RFC_4122)
+
+    def test_uuid7_increasing(self):
+        """Test ids made one after the other sort in creation order"""
+        keys = [ids.uuid7() for _ in range(1000)]
+
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_new_quates_time_ordered(self):
+        """Test new quates get time-ordered keys by default"""
+        self.assertEqual(Quate().quate_id.version, 7)
+
+    def test_random_ids(self):
+        """Test time-ordered ids can be turned off"""
+        with self.settings(TIME_ORDERED_IDS=False):
+            self.assertEqual(Quate().quate_id.version, 4)
@@ -0,0 +1,173 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.instrumentation import Timings, _timings, metrics
+from core.models import Policy, Quate
+from pet.serializers import PolicyExpandedSerializer
+
+
+QUATE_URL = reverse('quate:quate-list')
+METRICS_URL = reverse('metrics')
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+class InstrumentationTests(TestCase):
+    """Test timing the requests"""
+
+    def setUp(self):
+        self.client = APIClient()
+        metrics.reset()
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_server_timing(self):
+        """Test a sampled request reports its queries and timings"""
+        Quate.objects.create(quate_id='c83cbe43-5c30-4a5f-860b-5b8e9927ff8e')
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                QUATE_URL, HTTP_AUTHORIZATION='Bearer scrape-token'
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timing = res['Server-Timing']
+        self.assertIn('desc="1 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_server_timing_staff_only(self):
+        """Test the timings are only sent back to staff users"""
+        res = self.client.get(QUATE_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(metrics.sampled, {'quate:quate-list': 1})
+
+        self.client.force_login(get_user_model().objects.create_superuser(
+            'admin@rainwalk.io', 'password12345'
+        ))
+        res = self.client.get(QUATE_URL)
+
+        self.assertIn('Server-Timing', res)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """Test requests left out of the sample are only counted"""
+        res = self.client.get(QUATE_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(metrics.requests, {'quate:quate-list': 1})
+        self.assertEqual(metrics.sampled, {})
+
+    def test_metrics(self):
+        """Test the totals are served in the Prometheus format"""
+        self.client.get(QUATE_URL)
+        self.client.get(QUATE_URL)
+
+        self.client.force_login(get_user_model().objects.create_superuser(
+            'admin@rainwalk.io', 'password12345'
+        ))
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        self.assertIn(
+            'app_requests_total{endpoint="quate:quate-list"} 2', body
+        )
+        self.assertIn(
+            'app_request_queries_total{endpoint="quate:quate-list"} 2', body
+        )
+        self.assertIn(
+            'app_request_duration_seconds_count'
+            '{endpoint="quate:quate-list"} 2',
+            body
+        )
+        self.assertIn('app_request_serialize_seconds_total'
+                      '{endpoint="quate:quate-list"}', body)
+
+    def test_serialize_timed(self):
+        """Test serializing is timed once, nested serializers included"""
+        Quate.objects.create(quate_id='c83cbe43-5c30-4a5f-860b-5b8e9927ff8e')
+        timings = Timings()
+        token = _timings.set(timings)
+        try:
+            data = PolicyExpandedSerializer(Policy(
+                policy_number='P-1',
+                policy_quate_number=Quate.objects.get(),
+            )).data
+        finally:
+            _timings.reset(token)
+
+        self.assertEqual(data['policy_number'], 'P-1')
+        self.assertGreater(timings.serialize, 0)
+        self.assertFalse(timings.serializing)
+
+    def test_metrics_need_staff(self):
+        """Test the metrics are not served to anonymous or regular users"""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_login(get_user_model().objects.create_user(
+            'test@rainwalk.io', 'password12345'
+        ))
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN='scrape-token')
+    def test_metrics_token(self):
+        """Test a scraper sending the metrics token is served the metrics"""
+        res = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer scrape-token'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer other')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_histogram_buckets(self):
+        """Test the duration buckets are cumulative"""
+        timings = Timings()
+        timings.total = 0.03
+        metrics.observe('test', timings)
+
+        body = metrics.exposition()
+
+        self.assertIn(
+            'app_request_duration_seconds_bucket'
+            '{endpoint="test",le="0.025"} 0',
+            body
+        )
+        self.assertIn(
+            'app_request_duration_seconds_bucket{endpoint="test",le="5"} 1',
+            body
+        )
+
+
+@override_settings(
+    ROOT_URLCONF='app.urls_async', INSTRUMENTATION_SAMPLE_RATE=1.0,
+    METRICS_TOKEN='scrape-token',
+)
+class AsyncInstrumentationTests(TransactionTestCase):
+    """Test timing the requests served by the async views"""
+
+    async def test_server_timing(self):
+        """Test the queries run on the API threads are counted"""
+        # Django 3.1's async client takes headers by their own name
+        res = await self.async_client.get(
+            QUATE_URL, authorization='Bearer scrape-token'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="1 queries"', res['Server-Timing'])
+        self.assertIn('serialize;dur=', res['Server-Timing'])
+
+    async def test_server_timing_anonymous(self):
+        """Test anonymous clients get no timings from the async views"""
+        res = await self.async_client.get(QUATE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', res)
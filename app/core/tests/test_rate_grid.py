@@ -0,0 +1,133 @@
+import os
+import struct
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from core import rate_grid, rating
+from core.constants import factor_tables
+from core.models import Quate
+from core.rate_grid import HEADER, RateGrid
+from core.rate_tables import RATE_TABLES
+from core.rating import Rater, get_rater, price_quate, use_grid
+
+
+class RateGridTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rater = Rater('2021.2')
+        cls.grid = RateGrid.build(cls.rater)
+
+    def test_grid_matches_rater(self):
+        """Test grid premiums match rating the quate in full"""
+        table = RATE_TABLES['2021.2']
+        quates = [
+            Quate(
+                breed_factor=breed,
+                age_factor=factor_tables.AGES[code % 21],
+                policy_limit_factor=factor_tables.LIMITS[code % 19],
+                deductibale_factor=table['deductibles'][code % 5],
+                coinsurance_factor=table['coinsurances'][code % 6],
+                gender_factor=factor_tables.GENDERS[code % 2],
+                exam_fee_factor=code % 3 == 0,
+                employee_benefit_factor=0.1,
+            )
+            for breed, code in factor_tables.BREED_CODES.items()
+        ]
+
+        locations = (('', ''), ('NY', ''), ('OH', ''), ('NY', '10001'),
+                     ('OH', '94105'), ('OH', '43004'))
+        for state, zipcode in locations:
+            for quate in quates:
+                self.assertAlmostEqual(
+                    self.grid.price(quate, state, zipcode),
+                    self.rater.price(quate, state, zipcode),
+                    delta=0.01,
+                )
+
+    def test_off_grid_values_rated_in_full(self):
+        """Test values outside the grid fall back to the rater"""
+        quate = Quate(deductibale_factor=300, coinsurance_factor=75)
+
+        self.assertIsNone(self.grid.cell(
+            'NY', '', '', '', quate.deductibale_factor,
+            quate.coinsurance_factor,
+        ))
+        self.assertEqual(self.grid.price(quate, 'NY'),
+                         self.rater.price(quate, 'NY'))
+
+    def test_geographical_factor_overrides_state(self):
+        """Test a quate's geographical factor replaces the state"""
+        quate = Quate(geographical_factor=1.5, age_factor='3 years')
+
+        self.assertEqual(self.grid.price(quate, 'NY'),
+                         self.rater.price(quate, 'NY'))
+
+    def test_save_and_load(self):
+        """Test a saved grid is memory-mapped back with the same cells"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'grid')
+            self.grid.save(path)
+
+            loaded = RateGrid.load(path, self.rater)
+            try:
+                self.assertEqual(loaded.cells[0], self.grid.cells[0])
+                self.assertEqual(loaded.cells[-1], self.grid.cells[-1])
+                self.assertEqual(loaded.price(Quate(), 'CA'),
+                                 self.grid.price(Quate(), 'CA'))
+            finally:
+                loaded.cells.release()
+                loaded._buffer.close()
+
+    def test_cells_saved_little_endian(self):
+        """Test cells are saved in the same byte order on every host"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'grid')
+            self.grid.save(path)
+
+            with open(path, 'rb') as grid_file:
+                grid_file.seek(HEADER.size)
+                first = grid_file.read(8)
+
+        self.assertEqual(first, struct.pack('<d', self.grid.cells[0]))
+
+    def test_price_quate_uses_grid(self):
+        """Test single quates are priced from the grid of the rater"""
+        grid = RateGrid.build(get_rater())
+        self.addCleanup(use_grid, None)
+        use_grid(grid)
+
+        with patch.object(RateGrid, 'price', return_value=12.5) as price:
+            self.assertEqual(price_quate(Quate(), 'NY', '10001'), 12.5)
+        price.assert_called_once()
+
+    def test_grid_loaded_on_first_use(self):
+        """Test the grid of the active rater is loaded to price a quate"""
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(RATE_GRID_DIR=Path(directory)), \
+                patch.object(rate_grid, '_grid', None), \
+                patch.object(rating, '_grid', self.grid):
+            # The grid of another rater is never used
+            with patch.object(RateGrid, 'price', return_value=12.5):
+                self.assertEqual(price_quate(Quate(), 'NY'), 12.5)
+
+            self.assertIs(rating._grid.rater, get_rater())
+            self.assertTrue(os.path.exists(
+                rate_grid.grid_path(get_rater().version)
+            ))
+
+    def test_load_rejects_other_table(self):
+        """Test a grid built from another table is not loaded"""
+        other = Rater('2021.1')
+        other.table = dict(other.table, base_rate='60.00')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'grid')
+            self.grid.save(path)
+
+            with self.assertRaises(ValueError):
+                RateGrid.load(path, other)
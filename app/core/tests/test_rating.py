@@ -0,0 +1,235 @@
+import tempfile
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import rating
+from core.rate_tables import RATE_TABLES
+from core.constants.breed_list import BREED_LIST
+from core.models import Policy, Quate
+
+
+def sample_quate(quate_id, **params):
+    """Create a sample quate"""
+    return Quate.objects.create(quate_id=uuid.UUID(quate_id), **params)
+
+
+def breed(name):
+    """Return the breed choice with the given name"""
+    return next(
+        value
+        for _, breeds in BREED_LIST
+        for value, _ in breeds
+        if value.strip() == name
+    )
+
+
+class RatingTest(TestCase):
+
+    def test_default_quate_is_priced_at_base_rate(self):
+        """Test a quate with default factors costs the base rate"""
+        quate = sample_quate('c83cbe43-5c30-4a5f-860b-5b8e9927ff8e')
+
+        self.assertEqual(rating.price_quate(quate), 54.11)
+
+    def test_factors_change_premium(self):
+        """Test that rating factors are applied to the base rate"""
+        quate = Quate(
+            base_rate=100,
+            gender_factor='Male',
+            breed_factor=breed('Persian'),
+            age_factor='2 years',
+            policy_limit_factor='$10,000',
+            exam_fee_factor=True,
+            smart_collar_factor=True,
+        )
+        expected = 100 * 1.05 * (0.75 * 1.3) * 1.10 * 1.0 * 1.10 * 0.95
+
+        self.assertEqual(rating.price_quate(quate), round(expected, 2))
+
+    def test_state_rated_without_geographical_factor(self):
+        """Test the state relativity replaces a missing geographical factor"""
+        quate = Quate(base_rate=100)
+        rated = Quate(base_rate=100, geographical_factor=1.5)
+
+        self.assertEqual(rating.price_quate(quate, 'NY'), 120.0)
+        self.assertEqual(rating.price_quate(rated, 'NY'), 150.0)
+
+    def test_territory_rated_before_state(self):
+        """Test the territory of the ZIP code replaces the state"""
+        quate = Quate(base_rate=100)
+
+        with self.settings(RATE_TABLE_VERSION='2021.2'):
+            self.assertEqual(rating.price_quate(quate, 'NY', '10001'), 135.0)
+            self.assertEqual(rating.price_quate(quate, 'NY', '14201'), 120.0)
+            self.assertEqual(rating.price_quate(quate, '', '94105'), 130.0)
+
+    def test_rate_table_version_change(self):
+        """Test a new rate table version is picked up and drops the cache"""
+        rating.price_quate_cached(Quate())
+        tables = dict(RATE_TABLES, test={
+            **RATE_TABLES['2021.1'], 'genders': {'Male': 2.0},
+        })
+
+        # The grid of the test version is built and saved out of the tree
+        with patch.dict(RATE_TABLES, tables), \
+                tempfile.TemporaryDirectory() as directory, \
+                self.settings(RATE_TABLE_VERSION='test',
+                              RATE_GRID_DIR=Path(directory)):
+            premium = rating.price_quate(Quate(gender_factor='Male'))
+
+        self.assertEqual(premium, 108.22)
+        self.assertEqual(rating.pricing_cache.stats()['size'], 0)
+
+    def test_batch_matches_single_quate_pricing(self):
+        """Test the batch engine prices like the per-quate calculation"""
+        quates = [
+            Quate(breed_factor=breed('Beagle'), age_factor='5 years'),
+            Quate(gender_factor='Female', policy_limit_factor='Unlimited'),
+            Quate(deductibale_factor=100, coinsurance_factor=90),
+            Quate(breeding_endorsement='Male', employee_benefit_factor=0.1),
+        ]
+
+        self.assertEqual(
+            rating.price_quates(quates),
+            [rating.price_quate(quate) for quate in quates]
+        )
+
+    def test_price_queryset(self):
+        """Test pricing quates straight from the database"""
+        quate1 = sample_quate('c83cbe43-5c30-4a5f-860b-5b8e9927ff8e')
+        quate2 = sample_quate(
+            '8d60c12a-1ac5-4903-a1e3-0a3a4fc16989',
+            age_factor='10 years',
+        )
+
+        premiums = rating.price_queryset(Quate.objects.all())
+
+        self.assertEqual(premiums, {
+            quate1.quate_id: rating.price_quate(quate1),
+            quate2.quate_id: rating.price_quate(quate2),
+        })
+
+    def test_batch_rates_locations(self):
+        """Test the batch engine rates locations like price_quate"""
+        quates = [Quate(), Quate(), Quate(), Quate(geographical_factor=1.5)]
+        locations = [('NY', '10001'), ('NY', '14201'), ('', ''),
+                     ('NY', '10001')]
+
+        with self.settings(RATE_TABLE_VERSION='2021.2'):
+            self.assertEqual(
+                rating.price_quates(quates, locations),
+                [rating.price_quate(quate, *location)
+                 for quate, location in zip(quates, locations)]
+            )
+
+    def test_price_queryset_rates_policy_holder(self):
+        """Test quates are rated at the ZIP code of their policy holder"""
+        user = get_user_model().objects.create_user(
+            'test@rainwalk.io', 'password12345', state='NY', zipcode='10001'
+        )
+        bound = sample_quate('c83cbe43-5c30-4a5f-860b-5b8e9927ff8e')
+        Policy.objects.create(policy_number='PA-1', user=user,
+                              policy_quate_number=bound)
+        unbound = sample_quate('8d60c12a-1ac5-4903-a1e3-0a3a4fc16989')
+
+        with self.settings(RATE_TABLE_VERSION='2021.2'):
+            premiums = rating.price_queryset(Quate.objects.all())
+
+        self.assertEqual(premiums, {
+            bound.quate_id: round(54.11 * 1.35, 2),
+            unbound.quate_id: 54.11,
+        })
+
+    def test_price_empty_batch(self):
+        """Test pricing an empty batch"""
+        self.assertEqual(rating.price_rows([]), [])
+        self.assertEqual(rating.price_queryset(Quate.objects.none()), {})
+
+
+class PricingCacheTest(TestCase):
+
+    def setUp(self):
+        self.cache = rating.PricingCache(max_size=2)
+
+    def test_same_factors_share_a_price(self):
+        """Test quates differing only in id and name are priced once"""
+        quate1 = sample_quate(
+            'c83cbe43-5c30-4a5f-860b-5b8e9927ff8e',
+            pet_name='Max',
+            age_factor='3 years',
+        )
+        quate2 = Quate(pet_name='Rex', age_factor='3 years')
+
+        self.assertEqual(self.cache.price(quate1), self.cache.price(quate2))
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_location_part_of_key(self):
+        """Test quates of policy holders in other places are priced apart"""
+        quate = Quate()
+
+        with self.settings(RATE_TABLE_VERSION='2021.2'):
+            self.assertEqual(self.cache.price(quate), 54.11)
+            self.assertEqual(self.cache.price(quate, 'NY', '10001'),
+                             round(54.11 * 1.35, 2))
+            self.assertEqual(self.cache.price(quate, 'NY'),
+                             round(54.11 * 1.2, 2))
+
+    def test_cleared_while_pricing(self):
+        """Test a premium rated while the cache is cleared isn't kept"""
+        price = rating.Rater.price
+
+        def price_and_clear(rater, *args):
+            self.cache.clear()
+            return price(rater, *args)
+
+        with patch.object(rating.Rater, 'price', price_and_clear):
+            self.cache.price(Quate())
+
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_version_part_of_key(self):
+        """Test premiums of another rate table version are not served"""
+        self.cache.price(Quate(gender_factor='Male'))
+        tables = dict(RATE_TABLES, test={
+            **RATE_TABLES['2021.1'], 'genders': {'Male': 2.0},
+        })
+
+        # The grid of the test version is built and saved out of the tree
+        with patch.dict(RATE_TABLES, tables), \
+                tempfile.TemporaryDirectory() as directory, \
+                self.settings(RATE_TABLE_VERSION='test',
+                              RATE_GRID_DIR=Path(directory)):
+            # Switch raters without the signal clearing the cache
+            with patch.object(rating.rate_tables_changed, 'send'):
+                premium = self.cache.price(Quate(gender_factor='Male'))
+
+        self.assertEqual(premium, 108.22)
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently used premium is dropped when full"""
+        quate1 = Quate(age_factor='1 year')
+        quate2 = Quate(age_factor='2 years')
+        quate3 = Quate(age_factor='3 years')
+        self.cache.price(quate1)
+        self.cache.price(quate2)
+        self.cache.price(quate1)
+        self.cache.price(quate3)
+
+        self.cache.price(quate1)
+        self.cache.price(quate2)
+
+        self.assertEqual(self.cache.stats()['size'], 2)
+        self.assertEqual(self.cache.hits, 2)
+        self.assertEqual(self.cache.misses, 4)
+
+    def test_cleared_when_rate_tables_change(self):
+        """Test cached premiums are dropped when the rate tables change"""
+        rating.price_quate_cached(Quate())
+        rating.rate_tables_changed.send(sender=None)
+
+        self.assertEqual(rating.pricing_cache.stats()['size'], 0)
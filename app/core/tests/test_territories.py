@@ -0,0 +1,44 @@
+from django.test import TestCase
+
+from core.rate_tables import RATE_TABLES
+from core.territories import Territory, TerritoryIndex
+
+
+class TerritoryIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = TerritoryIndex(RATE_TABLES['2021.2']['territories'])
+
+    def test_lookup(self):
+        """Test ZIP codes are found in the range holding them"""
+        self.assertEqual(self.index.lookup('10001'),
+                         Territory('NY-NYC', 1.35))
+        self.assertEqual(self.index.lookup('10299').code, 'NY-NYC')
+        self.assertEqual(self.index.lookup('90210').code, 'CA-LA')
+        self.assertEqual(self.index.lookup('07030').code, 'NJ-NORTH')
+        self.assertEqual(self.index.lookup('94105-1234').code, 'CA-SF')
+
+    def test_outside_territories(self):
+        """Test ZIP codes between or around the ranges have no territory"""
+        for zipcode in ('00000', '10300', '11200', '90100', '99999'):
+            self.assertIsNone(self.index.lookup(zipcode))
+
+    def test_invalid_zipcodes(self):
+        """Test ZIP codes that aren't numbers have no territory"""
+        for zipcode in ('', 'ABCDE', None):
+            self.assertIsNone(self.index.lookup(zipcode))
+
+    def test_overlapping_ranges_rejected(self):
+        """Test a ZIP code can't be in two territories"""
+        with self.assertRaises(ValueError):
+            TerritoryIndex((
+                ('A', 1.1, (('10000', '10500'),)),
+                ('B', 1.2, (('10400', '10600'),)),
+            ))
+
+    def test_no_territories(self):
+        """Test a rate table without territories finds none"""
+        index = TerritoryIndex(())
+
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.lookup('10001'))
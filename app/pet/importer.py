@@ -0,0 +1,196 @@
+"""Bulk import of policies, each with its quate, from another carrier
+
+Rows are dicts, such as the ones csv.DictReader reads, with
+
+    - email, the user the policy is for, who must already exist
+    - policy_number, unique across the book
+    - policy_premium, by name (silver) or number (0)
+    - any field of Quate, e.g. breed_factor or deductibale_factor,
+      left out or empty for the default
+
+The rows are streamed in batches. A batch is validated against the
+choices of core.constants, its users are resolved by email in a single
+query, and its valid rows are inserted with bulk_create in one
+transaction. Rejected rows are handed to a callback with their errors,
+so only a batch is ever held in memory.
+"""
+import itertools
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.models import Policy, Quate
+
+
+# Columns every row must fill in
+REQUIRED = ('email', 'policy_number')
+
+
+class Column:
+    """Turns the text of a column into the value of a model field"""
+
+    def __init__(self, field):
+        self.field = field
+        self.name = field.attname
+        # Choices match by value or label, ignoring case and the
+        # stray spaces some of the constants carry
+        self.choices = None
+        if field.choices:
+            self.choices = {}
+            for value, label in field.flatchoices:
+                self.choices[str(label).strip().lower()] = value
+                self.choices[str(value).strip().lower()] = value
+
+    def clean(self, text):
+        text = (text or '').strip()
+        if not text:
+            if self.name in REQUIRED:
+                raise ValidationError('This field is required.')
+            if self.field.has_default():
+                return self.field.get_default()
+            if self.field.blank:
+                return ''
+
+            raise ValidationError('This field is required.')
+
+        value = text
+        if self.choices is not None:
+            if text.lower() not in self.choices:
+                raise ValidationError(f'"{text}" is not a valid choice.')
+            value = self.choices[text.lower()]
+        value = self.field.to_python(value)
+        self.field.run_validators(value)
+
+        return value
+
+
+POLICY_COLUMNS = [
+    Column(Policy._meta.get_field(name))
+    for name in ('policy_number', 'policy_premium')
+]
+QUATE_COLUMNS = [Column(field) for field in Quate._meta.concrete_fields]
+
+
+class PolicyImporter:
+    """Import rows of policies, remembering the keys taken so far"""
+
+    def __init__(self, batch_size=1000, on_reject=None):
+        self.batch_size = batch_size
+        self.on_reject = on_reject
+        self.policy_numbers = set()
+        self.quate_ids = set()
+        self.imported = 0
+        self.rejected = 0
+
+    def import_rows(self, rows, progress=None):
+        """Import every row, returns the rows imported and rejected"""
+        started = time.monotonic()
+        rows = enumerate(rows, start=1)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            if progress is not None:
+                progress(self.imported, self.rejected,
+                         time.monotonic() - started)
+
+        return self.imported, self.rejected
+
+    def reject(self, number, row, errors):
+        self.rejected += 1
+        if self.on_reject is not None:
+            self.on_reject(number, row, errors)
+
+    def import_batch(self, batch):
+        """Validate and insert a batch of (row number, row) pairs"""
+        cleaned = []
+        for number, row in batch:
+            errors = {}
+            values = {}
+            for column in POLICY_COLUMNS + QUATE_COLUMNS:
+                try:
+                    values[column.name] = column.clean(row.get(column.name))
+                except ValidationError as error:
+                    errors[column.name] = ' '.join(error.messages)
+            email = (row.get('email') or '').strip()
+            if not email:
+                errors['email'] = 'This field is required.'
+            values['email'] = get_user_model().objects.normalize_email(email)
+
+            if errors:
+                self.reject(number, row, errors)
+            else:
+                cleaned.append((number, row, values))
+        if not cleaned:
+            return
+
+        users = dict(
+            get_user_model().objects.filter(
+                email__in={values['email'] for _, _, values in cleaned}
+            ).values_list('email', 'pk')
+        )
+        taken_numbers = set(
+            Policy.objects.filter(
+                policy_number__in=[
+                    values['policy_number'] for _, _, values in cleaned
+                ]
+            ).values_list('policy_number', flat=True)
+        )
+        taken_ids = set(
+            Quate.objects.filter(
+                quate_id__in=[values['quate_id'] for _, _, values in cleaned]
+            ).values_list('quate_id', flat=True)
+        )
+
+        quates = []
+        policies = []
+        for number, row, values in cleaned:
+            errors = {}
+            if values['email'] not in users:
+                errors['email'] = 'No user with this email.'
+            policy_number = values['policy_number']
+            if (policy_number in taken_numbers or
+                    policy_number in self.policy_numbers):
+                errors['policy_number'] = 'Policy number already exists.'
+            quate_id = values['quate_id']
+            if quate_id in taken_ids or quate_id in self.quate_ids:
+                errors['quate_id'] = 'Quate already exists.'
+            if errors:
+                self.reject(number, row, errors)
+                continue
+
+            self.policy_numbers.add(policy_number)
+            self.quate_ids.add(quate_id)
+            quate = Quate(**{
+                column.name: values[column.name] for column in QUATE_COLUMNS
+            })
+            quates.append(quate)
+            policies.append(Policy(
+                policy_number=policy_number,
+                policy_premium=values['policy_premium'],
+                policy_quate_number=quate,
+                user_id=users[values['email']],
+            ))
+
+        if not policies:
+            return
+
+        with transaction.atomic():
+            Quate.objects.bulk_create(quates)
+            Policy.objects.bulk_create(policies)
+        self.imported += len(policies)
+
+
+def import_policies(rows, batch_size=1000, on_reject=None, progress=None):
+    """Import rows of policies, returns the rows imported and rejected
+
+    `on_reject` is called with the row number, the row and a dict of
+    errors by column of every rejected row. `progress` is called after
+    every batch with the running counts and elapsed seconds.
+    """
+    importer = PolicyImporter(batch_size, on_reject)
+
+    return importer.import_rows(rows, progress)
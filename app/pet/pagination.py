@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PolicyPagination(CursorPagination):
+    """Keyset pagination over the unique policy number
+
+    Pages are fetched with `policy_number > cursor` on the (user,
+    policy_number) index, so any page costs the same as the first one.
+    """
+    ordering = 'policy_number'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -1,9 +1,11 @@
 from rest_framework import serializers
 
-from core.models import Policy
+from core.instrumentation import TimedSerializerMixin
+from core.models import Policy, Quate
+from core.rating import RATING_FIELDS
 
 
-class PolicySerializer(serializers.ModelSerializer):
+class PolicySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for a policy object"""
 
     class Meta:
@@ -11,3 +13,18 @@ class PolicySerializer(serializers.ModelSerializer):
         fields = (
             'policy_number', 'policy_quate_number', 'policy_premium',
         )
+
+
+class PolicyQuateSerializer(TimedSerializerMixin,
+                            serializers.ModelSerializer):
+    """Serializer for the quate embedded in a policy"""
+
+    class Meta:
+        model = Quate
+        fields = ('quate_id', 'pet_name') + RATING_FIELDS
+        read_only_fields = fields
+
+
+class PolicyExpandedSerializer(PolicySerializer):
+    """Serializer for a policy with its quate embedded"""
+    policy_quate_number = PolicyQuateSerializer(read_only=True)
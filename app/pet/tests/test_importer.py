@@ -0,0 +1,170 @@
+import csv
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Policy, Quate
+
+from pet.importer import import_policies
+
+
+QUATE_ID = 'be1795f2-2921-47bc-af26-e9bbcdd12fc8'
+
+
+def sample_row(number, **params):
+    """Return a row of an import file"""
+    row = {
+        'email': 'test@rainwalk.io',
+        'policy_number': f'PA-{number}',
+        'policy_premium': 'gold',
+        'breed_factor': 'Affenpinscher',
+        'age_factor': '1 year',
+        'policy_limit_factor': '$1,000',
+        'base_rate': '18.50',
+    }
+    row.update(params)
+
+    return row
+
+
+class PolicyImportTests(TestCase):
+    """Test importing policies in bulk"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@rainwalk.io',
+            'password12345'
+        )
+        self.rejects = []
+
+    def on_reject(self, number, row, errors):
+        self.rejects.append((number, errors))
+
+    def test_import_policies(self):
+        """Test valid rows are imported with their quates"""
+        rows = [sample_row(1, quate_id=QUATE_ID), sample_row(2)]
+
+        imported, rejected = import_policies(rows, on_reject=self.on_reject)
+
+        self.assertEqual((imported, rejected), (2, 0))
+        policy = Policy.objects.get(policy_number='PA-1')
+        self.assertEqual(policy.user, self.user)
+        self.assertEqual(policy.policy_premium, Policy.PREMIUM_LIST.gold)
+        quate = policy.policy_quate_number
+        self.assertEqual(str(quate.quate_id), QUATE_ID)
+        # Matched to the choice as the constants spell it
+        self.assertEqual(quate.breed_factor, 'Affenpinscher\xa0')
+        self.assertEqual(quate.base_rate, Decimal('18.50'))
+        self.assertEqual(Quate.objects.count(), 2)
+
+    def test_invalid_rows_rejected(self):
+        """Test rows failing validation are reported and skipped"""
+        rows = [
+            sample_row(1, breed_factor='Unicorn'),
+            sample_row(2, deductibale_factor='lots'),
+            sample_row(3, email='nobody@rainwalk.io'),
+            sample_row(4, policy_number=''),
+            sample_row(5),
+        ]
+
+        imported, rejected = import_policies(rows, on_reject=self.on_reject)
+
+        self.assertEqual((imported, rejected), (1, 4))
+        self.assertEqual(
+            [(number, sorted(errors)) for number, errors in self.rejects],
+            [(1, ['breed_factor']), (2, ['deductibale_factor']),
+             (4, ['policy_number']), (3, ['email'])]
+        )
+        self.assertTrue(Policy.objects.filter(policy_number='PA-5').exists())
+
+    def test_duplicates_rejected(self):
+        """Test policy numbers already taken, or repeated, are rejected"""
+        import_policies([sample_row(1)])
+
+        rows = [sample_row(1), sample_row(2), sample_row(2)]
+        imported, rejected = import_policies(rows, batch_size=2,
+                                             on_reject=self.on_reject)
+
+        self.assertEqual((imported, rejected), (1, 2))
+        self.assertEqual([number for number, _ in self.rejects], [1, 3])
+
+    def test_users_resolved_once_per_batch(self):
+        """Test a batch runs the same queries however many rows it has"""
+        rows = [sample_row(number) for number in range(50)]
+
+        # users, taken policy numbers, taken quates, and the inserts in
+        # their savepoint
+        with self.assertNumQueries(7):
+            import_policies(rows)
+
+    def test_command(self):
+        """Test the command writes the rejected rows to a file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.csv')
+            rejects_path = os.path.join(directory, 'rejects.csv')
+            rows = [sample_row(1), sample_row(2, age_factor='100 years')]
+            with open(path, 'w', newline='') as book:
+                writer = csv.DictWriter(book, list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            out = StringIO()
+
+            call_command('import_policies', path, '--rejects', rejects_path,
+                         stdout=out)
+
+            with open(rejects_path, newline='') as rejects_file:
+                rejects = list(csv.DictReader(rejects_file))
+
+        self.assertIn('Imported 1 policies, rejected 1 rows', out.getvalue())
+        self.assertEqual(len(rejects), 1)
+        self.assertEqual(rejects[0]['row'], '2')
+        self.assertTrue(rejects[0]['errors'].startswith('age_factor: '))
+        self.assertEqual(rejects[0]['policy_number'], 'PA-2')
+
+    def test_command_extra_fields(self):
+        """Test fields past the header are kept in the rejects file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.csv')
+            rejects_path = os.path.join(directory, 'rejects.csv')
+            with open(path, 'w', newline='') as book:
+                book.write('email,policy_number\nnobody@r.io,PA-1,a,b\n')
+
+            call_command('import_policies', path, '--rejects', rejects_path,
+                         stdout=StringIO())
+
+            with open(rejects_path, newline='') as rejects_file:
+                [reject] = list(csv.DictReader(rejects_file))
+
+        self.assertEqual(reject['policy_number'], 'PA-1')
+        self.assertEqual(reject['extra_fields'], 'a,b')
+
+    def test_command_byte_order_mark(self):
+        """Test a file starting with a UTF-8 byte order mark is imported"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.csv')
+            row = sample_row(1)
+            with open(path, 'w', newline='', encoding='utf-8-sig') as book:
+                writer = csv.DictWriter(book, list(row))
+                writer.writeheader()
+                writer.writerow(row)
+            out = StringIO()
+
+            call_command('import_policies', path, stdout=out)
+
+        self.assertIn('Imported 1 policies, rejected 0 rows', out.getvalue())
+
+    def test_command_empty_file(self):
+        """Test an empty file is reported rather than crashing"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.csv')
+            open(path, 'w').close()
+
+            with self.assertRaises(CommandError):
+                call_command('import_policies', path, '--rejects',
+                             os.path.join(directory, 'rejects.csv'))
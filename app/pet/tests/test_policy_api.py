@@ -1,8 +1,14 @@
+import uuid
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from asgiref.sync import sync_to_async
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
 from core.models import Policy, Quate
@@ -11,6 +17,7 @@ from pet.serializers import PolicySerializer
 
 
 POLICY_URL = reverse('pet:policy-list')
+IMPORT_URL = reverse('pet:policy-import')
 
 
 def detail_url(policy_id):
@@ -18,9 +25,14 @@ def detail_url(policy_id):
     return reverse('pet:policy-detail', args=[policy_id])
 
 
+def quate_uuid(number):
+    """Return a quate id ordered by number"""
+    return f'00000000-0000-4000-8000-{number:012}'
+
+
 def sample_quate(quate_id):
     """Create a sample quate"""
-    return Quate.objects.create(quate_id=quate_id)
+    return Quate.objects.create(quate_id=uuid.UUID(quate_id))
 
 
 def sample_policy(user, **params):
@@ -80,7 +92,7 @@ class PrivatePoliciesAPITests(TestCase):
         serializer = PolicySerializer(policies, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_policies_limited_to_user(self):
         """Test that only policies for authenticated user are returned"""
@@ -104,8 +116,9 @@ class PrivatePoliciesAPITests(TestCase):
         res = self.client.get(POLICY_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['policy_number'], policy.policy_number)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['policy_number'],
+                         policy.policy_number)
 
     # def test_view_policy_detail(self):
     #     """Test viewing a policy detail"""
@@ -161,4 +174,178 @@ class PrivatePoliciesAPITests(TestCase):
 
         serializer1 = PolicySerializer(policy1)
 
-        self.assertIn(serializer1.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+
+    def test_policy_list_paginated(self):
+        """Test policies are listed a page at a time"""
+        for number in range(5):
+            Policy.objects.create(
+                user=self.user,
+                policy_number=f'PA-{number}',
+                policy_quate_number=sample_quate(quate_uuid(number)),
+            )
+
+        res = self.client.get(POLICY_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [policy['policy_number'] for policy in res.data['results']],
+            ['PA-0', 'PA-1']
+        )
+
+        res = self.client.get(res.data['next'])
+        self.assertEqual(
+            [policy['policy_number'] for policy in res.data['results']],
+            ['PA-2', 'PA-3']
+        )
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_expand_quates(self):
+        """Test the quates are embedded with one query for the page"""
+        for number in range(3):
+            Policy.objects.create(
+                user=self.user,
+                policy_number=f'PA-{number}',
+                policy_quate_number=sample_quate(quate_uuid(number)),
+            )
+
+        with self.assertNumQueries(1):
+            res = self.client.get(POLICY_URL, {'expand': 'quate'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        quates = [
+            policy['policy_quate_number'] for policy in res.data['results']
+        ]
+        self.assertEqual(
+            [quate['quate_id'] for quate in quates],
+            [quate_uuid(number) for number in range(3)]
+        )
+        self.assertEqual(quates[0]['base_rate'], '54.11')
+
+
+@override_settings(ROOT_URLCONF='app.urls_async')
+class AsyncPoliciesApiTests(TransactionTestCase):
+    """Test the policies API served by the async views"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@rainwalk.io',
+            'password12345'
+        )
+        token = Token.objects.create(user=self.user)
+        self.headers = {'authorization': f'Token {token.key}'}
+
+    async def test_login_required(self):
+        """Test that login is still required"""
+        res = await self.async_client.get(POLICY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_create_and_list_policies(self):
+        """Test creating and listing policies"""
+        quate = await sync_to_async(sample_quate)(
+            'be1795f2-2921-47bc-af26-e9bbcdd12fc8'
+        )
+
+        res = await self.async_client.post(
+            POLICY_URL,
+            {'policy_premium': 1, 'policy_quate_number': quate.quate_id},
+            content_type='application/json',
+            **self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = await self.async_client.get(POLICY_URL, **self.headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json()['results'][0]['policy_quate_number'],
+            str(quate.quate_id)
+        )
+
+
+class PolicyImportApiTests(TestCase):
+    """Test importing policies from an uploaded file"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@rainwalk.io',
+            'password12345'
+        )
+
+    def upload(self, content):
+        """Return an uploaded CSV file"""
+        return SimpleUploadedFile('book.csv', content.encode(),
+                                  content_type='text/csv')
+
+    def test_staff_required(self):
+        """Test only staff can import policies"""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.post(IMPORT_URL, {'file': self.upload('')})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_policies(self):
+        """Test the rows are imported and the rejected ones reported"""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        content = (
+            'email,policy_number,age_factor\n'
+            'test@rainwalk.io,PA-1,1 year\n'
+            'test@rainwalk.io,PA-2,100 years\n'
+        )
+
+        res = self.client.post(IMPORT_URL, {'file': self.upload(content)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(res.data['rejected'], 1)
+        self.assertEqual(res.data['rejects'][0]['row'], 2)
+        self.assertIn('age_factor', res.data['rejects'][0]['errors'])
+        self.assertTrue(
+            Policy.objects.filter(policy_number='PA-1',
+                                  user=self.user).exists()
+        )
+
+    def test_import_byte_order_mark(self):
+        """Test a file starting with a UTF-8 byte order mark is imported"""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        content = '\ufeffemail,policy_number\ntest@rainwalk.io,PA-1\n'
+
+        res = self.client.post(IMPORT_URL, {'file': self.upload(content)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['imported'], 1)
+        self.assertEqual(res.data['rejected'], 0)
+
+    def test_file_required(self):
+        """Test importing without a file fails"""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        res = self.client.post(IMPORT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_failed_import_imports_nothing(self):
+        """Test a file failing after some batches leaves no policies"""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        content = 'email,policy_number\n' + ''.join(
+            f'test@rainwalk.io,PA-{number}\n' for number in range(1500)
+        )
+        upload = SimpleUploadedFile(
+            'book.csv', content.encode() + b'test@rainwalk.io,\xff\n',
+            content_type='text/csv'
+        )
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['imported'], 0)
+        self.assertFalse(Policy.objects.exists())
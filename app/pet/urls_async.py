@@ -0,0 +1,7 @@
+from core.async_views import async_urlpatterns
+
+from pet import urls
+
+app_name = 'pet'
+
+urlpatterns = async_urlpatterns(urls.urlpatterns)
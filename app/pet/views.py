@@ -1,27 +1,105 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+import csv
+import io
 
+from django.db import transaction
+
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+
+from core.authentication import CachedTokenAuthentication
 from core.models import Policy
 
 from pet import serializers
+from pet.importer import import_policies
+from pet.pagination import PolicyPagination
+
+
+# Rejected rows listed in the response of an import, the rest are counted
+MAX_REPORTED_REJECTS = 1000
 
 
 class PolicyViewSet(viewsets.GenericViewSet,
                     mixins.ListModelMixin,
                     mixins.CreateModelMixin):
     """Manage polices in the database"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     queryset = Policy.objects.all()
     serializer_class = serializers.PolicySerializer
+    pagination_class = PolicyPagination
+
+    def _expand_quate(self):
+        """Whether the quates should be embedded, with ?expand=quate"""
+        expand = self.request.query_params.get('expand', '')
+        return self.action == 'list' and 'quate' in expand.split(',')
 
     def get_queryset(self):
         """Return objects for the current authenticated user only"""
-        return self.queryset.filter(
+        queryset = self.queryset
+        if self._expand_quate():
+            queryset = queryset.select_related('policy_quate_number')
+
+        return queryset.filter(
             user=self.request.user
         ).order_by('policy_number')
 
+    def get_serializer_class(self):
+        """Return the serializer embedding the quates when expanding"""
+        if self._expand_quate():
+            return serializers.PolicyExpandedSerializer
+
+        return self.serializer_class
+
     def perform_create(self, serializer):
         """Create a new policy"""
         serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post'], url_path='import',
+            url_name='import', parser_classes=(MultiPartParser,),
+            permission_classes=(IsAdminUser,))
+    def import_policies(self, request):
+        """Import the policies of an uploaded CSV file, for staff only
+
+        The file is imported in a single transaction, so a file that
+        fails partway, or a request that times out, imports nothing and
+        can be uploaded again once fixed. Load large books with the
+        import_policies command, which commits batch by batch.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'file': ['No file was submitted.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rejects = []
+
+        def on_reject(number, row, errors):
+            if len(rejects) < MAX_REPORTED_REJECTS:
+                rejects.append({'row': number, 'errors': errors})
+
+        # utf-8-sig drops the byte order mark Excel starts its files with
+        rows = csv.DictReader(
+            io.TextIOWrapper(upload, encoding='utf-8-sig')
+        )
+        try:
+            with transaction.atomic():
+                imported, rejected = import_policies(
+                    rows, on_reject=on_reject
+                )
+        except UnicodeDecodeError:
+            return Response(
+                {
+                    'file': ['The file must be a UTF-8 encoded CSV file, '
+                             'no policies were imported.'],
+                    'imported': 0,
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {'imported': imported, 'rejected': rejected, 'rejects': rejects}
+        )
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class QuateConfig(AppConfig):
     name = 'quate'
+
+    def ready(self):
+        # Connect the signal receivers
+        import quate.signals  # noqa: F401
@@ -0,0 +1,52 @@
+"""Cache of serialized quates for conditional GETs of the detail view
+
+The entries are dropped when a quate is saved or deleted, which only
+reaches every gunicorn worker when QUATE_CACHE is shared between them,
+e.g. memcached (see CACHE_BACKEND). With a per-process cache the
+entries are kept for a few seconds only.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def quate_cache():
+    return caches[settings.QUATE_CACHE]
+
+
+def cache_key(quate_id):
+    """Key of a quate, the same for every way of spelling its UUID"""
+    try:
+        quate_id = uuid.UUID(str(quate_id))
+    except ValueError:
+        pass
+
+    return f'quate:{quate_id}'
+
+
+def get(quate_id):
+    """Return the cached entry of a quate, or None"""
+    return quate_cache().get(cache_key(quate_id))
+
+
+def store(quate_id, data):
+    """Cache serialized quate data with its ETag"""
+    body = json.dumps(data, sort_keys=True, default=str).encode()
+    entry = {
+        'data': dict(data),
+        'etag': '"%s"' % hashlib.sha1(body).hexdigest(),
+    }
+    quate_cache().set(
+        cache_key(quate_id),
+        entry,
+        settings.QUATE_CACHE_TIMEOUT
+    )
+
+    return entry
+
+
+def invalidate(quate_id):
+    quate_cache().delete(cache_key(quate_id))
@@ -1,14 +1,89 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import ugettext_lazy as _
+
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 
 
+from core.instrumentation import TimedSerializerMixin
 from core.models import Quate
 
 
-class QuateSerializer(serializers.ModelSerializer):
+class QuateListSerializer(serializers.ListSerializer):
+    """Validate and create many quates in one go"""
+    default_error_messages = {
+        'max_length': _('Ensure this list has at most {max_length} '
+                        'elements.'),
+    }
+
+    def to_internal_value(self, data):
+        """Check quate id uniqueness for the whole batch in one query"""
+        # Refuse oversized batches before validating any of the items
+        max_length = settings.QUATE_BULK_MAX_SIZE
+        if isinstance(data, list) and len(data) > max_length:
+            message = self.error_messages['max_length'].format(
+                max_length=max_length
+            )
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]},
+                code='max_length'
+            )
+
+        validated_data = super().to_internal_value(data)
+
+        quate_ids = [
+            item['quate_id'] for item in validated_data if 'quate_id' in item
+        ]
+        taken = set(
+            Quate.objects.filter(
+                quate_id__in=quate_ids
+            ).values_list('quate_id', flat=True)
+        )
+        seen = set()
+        errors = []
+        for item in validated_data:
+            quate_id = item.get('quate_id')
+            if quate_id is not None and (quate_id in taken or
+                                         quate_id in seen):
+                errors.append({'quate_id': [self.child.unique_message]})
+            else:
+                errors.append({})
+            seen.add(quate_id)
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return validated_data
+
+    def create(self, validated_data):
+        """Insert all the quates with a single query"""
+        quates = [Quate(**item) for item in validated_data]
+        with transaction.atomic():
+            return Quate.objects.bulk_create(quates)
+
+
+class QuateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serialie a quate"""
+    unique_message = _('quate with this quate id already exists.')
 
     class Meta:
         model = Quate
         fields = (
             'quate_id',
         )
+        list_serializer_class = QuateListSerializer
+
+    def get_fields(self):
+        """Leave the uniqueness check to the list serializer in bulk mode"""
+        fields = super().get_fields()
+
+        if isinstance(self.parent, QuateListSerializer):
+            field = fields['quate_id']
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+
+        return fields
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Quate
+
+from quate import cache
+
+
+@receiver(post_save, sender=Quate)
+@receiver(post_delete, sender=Quate)
+def invalidate_quate(sender, instance, **kwargs):
+    """Stop serving a cached copy of a quate once it changes"""
+    cache.invalidate(instance.quate_id)
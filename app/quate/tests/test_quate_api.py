@@ -1,5 +1,6 @@
+from asgiref.sync import sync_to_async
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -60,3 +61,146 @@ class PublicQuateTests(TestCase):
         res = self.client.post(QUATE_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_quates(self):
+        """Test creating a list of quates in one request"""
+        payload = [
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff81'},
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff82'},
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff83'},
+        ]
+
+        with self.assertNumQueries(4):
+            res = self.client.post(QUATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, payload)
+        self.assertEqual(Quate.objects.count(), 3)
+
+    def test_bulk_create_quates_invalid(self):
+        """Test a bulk create reports errors per item and saves nothing"""
+        sample_quate('c83cbe43-5c30-4a5f-860b-5b8e9927ff81')
+        payload = [
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff81'},
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff82'},
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff82'},
+        ]
+
+        res = self.client.post(QUATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('quate_id', res.data[0])
+        self.assertEqual(res.data[1], {})
+        self.assertIn('quate_id', res.data[2])
+        self.assertEqual(Quate.objects.count(), 1)
+
+    @override_settings(QUATE_BULK_MAX_SIZE=2)
+    def test_bulk_create_too_many_quates(self):
+        """Test a bulk create larger than the maximum is refused"""
+        payload = [
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff81'},
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff82'},
+            {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff83'},
+        ]
+
+        with self.assertNumQueries(0):
+            res = self.client.post(QUATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('non_field_errors', res.data)
+        self.assertEqual(Quate.objects.count(), 0)
+
+
+@override_settings(ROOT_URLCONF='app.urls_async')
+class AsyncQuateTests(TransactionTestCase):
+    """Test the quate API served by the async views"""
+
+    async def test_create_and_view_quate(self):
+        """Test creating a quate and viewing its detail"""
+        payload = {'quate_id': 'c83cbe43-5c30-4a5f-860b-5b8e9927ff81'}
+
+        res = await self.async_client.post(
+            QUATE_URL,
+            payload,
+            content_type='application/json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = await self.async_client.get(detail_url(payload['quate_id']))
+        quate = await sync_to_async(Quate.objects.get)(**payload)
+        self.assertEqual(res.json(), QuateSerializer(quate).data)
+
+    async def test_delete_quate(self):
+        """Test deleting a quate"""
+        quate = await sync_to_async(sample_quate)(
+            'c83cbe43-5c30-4a5f-860b-5b8e9927ff8e'
+        )
+
+        res = await self.async_client.delete(detail_url(quate.quate_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        exists = await sync_to_async(
+            Quate.objects.filter(quate_id=quate.quate_id).exists
+        )()
+        self.assertFalse(exists)
+
+
+class QuateCacheTests(TestCase):
+    """Test conditional GETs of a quate"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.quate = sample_quate('c83cbe43-5c30-4a5f-860b-5b8e9927ff8e')
+        self.url = detail_url(self.quate.quate_id)
+
+    def test_not_modified(self):
+        """Test a quate the client has is answered from the cache"""
+        res = self.client.get(self.url)
+        self.assertIn('ETag', res)
+        self.assertNotIn('Last-Modified', res)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_detail(self):
+        """Test a quate is served from the cache without queries"""
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, QuateSerializer(self.quate).data)
+
+    def test_changed_quate_invalidated(self):
+        """Test saving a quate drops its cached copy"""
+        self.client.get(self.url)
+        self.quate.pet_name = 'Rex'
+        self.quate.save()
+
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_deleted_quate_invalidated(self):
+        """Test a deleted quate is not served from the cache"""
+        self.client.get(self.url)
+
+        res = self.client.delete(self.url)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_any_uuid_spelling_invalidated(self):
+        """Test a quate cached under another spelling of its id is dropped"""
+        url = detail_url(str(self.quate.quate_id).upper().replace('-', ''))
+        self.client.get(url)
+        self.quate.pet_name = 'Rex'
+        self.quate.save()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,7 @@
+from core.async_views import async_urlpatterns
+
+from quate import urls
+
+app_name = 'quate'
+
+urlpatterns = async_urlpatterns(urls.urlpatterns)
@@ -1,11 +1,38 @@
+from django.utils.cache import get_conditional_response
+
 from rest_framework import viewsets
+from rest_framework.response import Response
 
 from core.models import Quate
 
-from quate import serializers
+from quate import cache, serializers
 
 
 class QuateViewSet(viewsets.ModelViewSet):
     """Manage quates in the database"""
     serializer_class = serializers.QuateSerializer
     queryset = Quate.objects.all()
+
+    def get_serializer(self, *args, **kwargs):
+        """Accept a list of quates to create them in bulk"""
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+
+        return super().get_serializer(*args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return a quate from the cache, or 304 if the client has it"""
+        quate_id = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        entry = cache.get(quate_id)
+        if entry is None:
+            instance = self.get_object()
+            entry = cache.store(quate_id, self.get_serializer(instance).data)
+
+        # Quates don't record when they change, so there's no
+        # Last-Modified and clients revalidate with the ETag
+        response = Response(entry['data'], headers={'ETag': entry['etag']})
+        return get_conditional_response(
+            request,
+            etag=entry['etag'],
+            response=response,
+        )
@@ -0,0 +1,22 @@
+"""A bounded thread pool for password hashing
+
+PBKDF2 (hashlib) and argon2 release the GIL while deriving keys, so
+hashing on a few threads runs in parallel with the event loop instead
+of holding up every other request of an ASGI worker.
+"""
+from django.conf import settings
+
+from core.executors import get_executor, run_in_executor
+
+
+def hashing_executor():
+    """Return the process wide hashing pool"""
+    return get_executor(
+        'password-hashing',
+        settings.PASSWORD_HASHING_WORKERS
+    )
+
+
+async def run_in_hashing_pool(func, *args, **kwargs):
+    """Await func called on the hashing pool"""
+    return await run_in_executor(hashing_executor(), func, *args, **kwargs)
@@ -3,8 +3,10 @@ from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
 
+from core.instrumentation import TimedSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the user ibject"""
 
     class Meta:
@@ -32,15 +34,24 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)
 
     def update(self, instance, validated_data):
-        """update a user, settings the password correctly and return it"""
+        """update a user, settings the password correctly and return it
+
+        Only the fields given are saved, so columns changed elsewhere
+        since the user was loaded, like paid_until, are left alone.
+        """
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        update_fields = list(validated_data)
 
         if password:
-            user.set_password(password)
-            user.save()
+            instance.set_password(password)
+            update_fields.append('password')
+
+        if update_fields:
+            instance.save(update_fields=update_fields)
 
-        return user
+        return instance
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -1,7 +1,12 @@
-from django.test import TestCase
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from rest_framework import status
 
@@ -143,6 +148,67 @@ class PublicUserApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+@override_settings(ROOT_URLCONF='app.urls_async')
+class AsyncCreateUserApiTest(TransactionTestCase):
+    """Test creating users through the async view served by ASGI"""
+
+    async def test_create_valid_user_success(self):
+        """Test creating a user hashes the password on the pool"""
+        res = await self.async_client.post(
+            CREATE_USER_URL,
+            PAYLOAD,
+            content_type='application/json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('password', res.json())
+        user = await sync_to_async(get_user_model().objects.get)(
+            email=PAYLOAD['email']
+        )
+        self.assertTrue(user.check_password(PAYLOAD['password']))
+
+    async def test_password_too_short(self):
+        """Test the async view validates like the sync one"""
+        res = await self.async_client.post(
+            CREATE_USER_URL,
+            {**PAYLOAD, 'password': 'pw'},
+            content_type='application/json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', res.json())
+
+    async def test_malformed_body(self):
+        """Test a body that isn't valid JSON is a bad request"""
+        res = await self.async_client.post(
+            CREATE_USER_URL,
+            '{"email": ',
+            content_type='application/json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', res.json())
+
+    async def test_unsupported_content_type(self):
+        """Test a body in an unsupported format is rejected"""
+        res = await self.async_client.post(
+            CREATE_USER_URL,
+            'email=test@rainwalk.io',
+            content_type='text/plain'
+        )
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertIn('detail', res.json())
+
+    async def test_get_not_allowed(self):
+        """Test that only POST is allowed"""
+        res = await self.async_client.get(CREATE_USER_URL)
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
 class PrivateUserApiTests(TestCase):
     """Test API requests that require authentication"""
 
@@ -202,3 +268,23 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.zipcode, payload['zipcode'])
         self.assertEqual(self.user.state, payload['state'])
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_keeps_changes_made_elsewhere(self):
+        """Test updating the profile doesn't undo a cached user's changes"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        # Caches the authenticated user
+        client.get(ME_URL)
+        paid_until = timezone.now() + datetime.timedelta(days=30)
+        # Like a billing run, which sends no post_save
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            paid_until=paid_until
+        )
+
+        res = client.patch(ME_URL, {'name': 'new name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'new name')
+        self.assertEqual(self.user.paid_until, paid_until)
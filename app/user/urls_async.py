@@ -0,0 +1,13 @@
+from django.urls import path
+
+from core.async_views import async_urlpatterns
+
+from user import urls, views
+
+app_name = 'user'
+
+urlpatterns = [
+    path('create/', views.create_user_async, name='create'),
+] + async_urlpatterns(
+    pattern for pattern in urls.urlpatterns if pattern.name != 'create'
+)
@@ -1,7 +1,16 @@
-from rest_framework import generics, authentication, permissions
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication
+
+from user.hashing import run_in_hashing_pool
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -19,8 +28,52 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        """Return a fresh copy of the user
+
+        The authenticated user may come from the token cache, which
+        misses changes saved without post_save, like billing renewals.
+        """
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+async def create_user_async(request):
+    """Create a new user, hashing the password off the event loop
+
+    Served instead of CreateUserView by the ASGI app (app.urls_async).
+    Validation runs on Django's database thread, while the password
+    hashing and saving run on the bounded pool of user.hashing.
+    """
+    if request.method != 'POST':
+        return JsonResponse(
+            {'detail': f'Method "{request.method}" not allowed.'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+    try:
+        data = Request(request, parsers=parsers).data
+    except APIException as error:
+        # A malformed body or an unsupported content type, answered like
+        # DRF's exception handler would
+        return JsonResponse(
+            {'detail': error.detail},
+            status=error.status_code
+        )
+    serializer = UserSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(
+            serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    await run_in_hashing_pool(serializer.save)
+    return JsonResponse(serializer.data, status=status.HTTP_201_CREATED)
+
+
+# Token authenticated API, like the DRF views (csrf_exempt can't wrap an
+# async view on Django 3.1)
+create_user_async.csrf_exempt = True